@@ -0,0 +1,237 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Optional
+
+from database_pool import PoolExhaustedError
+from metrics import MetricsRegistry
+from models.admission_metrics import AdmissionMetrics
+
+logger = logging.getLogger(__name__)
+
+# Lanes have separate limits, so metadata lookups never wait behind long queries
+LANE_QUERY = "query"
+LANE_METADATA = "metadata"
+
+# Lower values are admitted first. Each level ranks a waiter as if it had arrived
+# PRIORITY_STEP_SECONDS later, so lower priorities are overtaken but never starved
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_STEP_SECONDS = 0.1
+
+# Weight of the latest hold time in the moving average used to estimate queue waits
+HOLD_TIME_SMOOTHING = 0.1
+
+CLIENT_ID_HEADER = b"x-client-id"
+
+# Identity of the client the current request came from, set by ClientIdentityMiddleware
+current_client: ContextVar[str] = ContextVar("current_client", default="local")
+
+class AdmissionRejectedError(PoolExhaustedError):
+    """
+    Raised when an operation is not admitted: the wait queue is full, or the deadline
+    passed (or would pass) before a slot is free. It is a PoolExhaustedError, so callers
+    answer it the same way: the server is busy, try again later.
+    """
+    pass
+
+class _Waiter:
+    __slots__ = ("rank", "client", "future", "queued_at")
+
+    def __init__(self, priority: int, sequence: int, client: str, future: asyncio.Future):
+        self.queued_at = time.monotonic()
+        self.rank = (self.queued_at + priority * PRIORITY_STEP_SECONDS, sequence)
+        self.client = client
+        self.future = future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return self.rank < other.rank
+
+class AdmissionController:
+    """
+    Limits how many database operations of one lane run at once, overall (max_concurrency)
+    and per client (max_per_client). Callers beyond the limits wait in a queue of at most
+    queue_size, in arrival order with lower priorities ranked later; a waiter whose client
+    is at its own limit is skipped in favour of the next one, so one busy client cannot
+    hold up the others.
+
+    A caller is rejected right away when the queue is full, or when its turn would come after
+    its deadline at the average time operations hold a slot. A waiter still queued at its
+    deadline (queue_timeout_seconds unless the caller's is sooner) is rejected then.
+    max_concurrency 0 disables the limits.
+    """
+    def __init__(
+        self,
+        lane: str,
+        max_concurrency: int,
+        max_per_client: int = 0,
+        queue_size: int = 100,
+        queue_timeout_seconds: float = 10.0,
+        metrics: Optional[MetricsRegistry] = None
+    ):
+        self.lane = lane
+        self.max_concurrency = max_concurrency
+        self.max_per_client = max_per_client
+        self.queue_size = queue_size
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._registry = metrics
+        self._running = 0
+        self._running_by_client: Dict[str, int] = {}
+        # Kept sorted, so the first eligible waiter is the next one admitted
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._average_hold_seconds = 0.0
+        self._wait_seconds_total = 0.0
+        self._metrics = AdmissionMetrics()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    @asynccontextmanager
+    async def admit(self, priority: int = PRIORITY_INTERACTIVE, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Holds a slot of this lane for the current client while the block runs.
+        deadline is a time.monotonic() value; raises AdmissionRejectedError when not admitted.
+        """
+        if not self.enabled:
+            yield
+            return
+        client = current_client.get()
+        await self._acquire(client, priority, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(client, time.monotonic() - started)
+
+    def metrics(self) -> AdmissionMetrics:
+        self._metrics.running = self._running
+        self._metrics.queued = len(self._waiters)
+        self._metrics.clients = len(self._running_by_client)
+        self._metrics.average_wait_ms = self._wait_seconds_total / self._metrics.waited * 1000 if self._metrics.waited else 0.0
+        self._metrics.average_hold_ms = self._average_hold_seconds * 1000
+        return self._metrics.model_copy()
+
+    def _can_run(self, client: str) -> bool:
+        if self._running >= self.max_concurrency:
+            return False
+        return self.max_per_client <= 0 or self._running_by_client.get(client, 0) < self.max_per_client
+
+    def _start(self, client: str) -> None:
+        self._running += 1
+        self._running_by_client[client] = self._running_by_client.get(client, 0) + 1
+        self._metrics.admitted += 1
+
+    async def _acquire(self, client: str, priority: int, deadline: Optional[float]) -> None:
+        now = time.monotonic()
+        # Waiters are dispatched as soon as a slot frees up, so with a slot free every waiter
+        # is held by its own client's limit and a caller that fits may go ahead of them
+        if self._can_run(client):
+            self._start(client)
+            self._observe_wait(0.0)
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            self._metrics.rejected_queue_full += 1
+            raise AdmissionRejectedError(
+                f"Too many {self.lane} operations are waiting ({len(self._waiters)}); try again later"
+            )
+        timeout_at = now + self.queue_timeout_seconds
+        if deadline is not None:
+            timeout_at = min(timeout_at, deadline)
+        waiter = _Waiter(priority, next(self._sequence), client, asyncio.get_running_loop().create_future())
+        ahead = bisect.bisect_left(self._waiters, waiter)
+        estimated_wait = (ahead + 1) * self._average_hold_seconds / self.max_concurrency
+        if now + estimated_wait > timeout_at:
+            self._metrics.rejected_deadline += 1
+            raise AdmissionRejectedError(
+                f"The estimated wait of {estimated_wait:.2f}s for a {self.lane} slot exceeds the deadline; try again later"
+            )
+        self._waiters.insert(ahead, waiter)
+        self._metrics.waited += 1
+        try:
+            await asyncio.wait_for(waiter.future, max(timeout_at - now, 0.0))
+        except BaseException as e:
+            self._remove_waiter(waiter)
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the wait ended: hand the slot to the next waiter
+                self._release(client, None)
+            if isinstance(e, asyncio.TimeoutError):
+                self._metrics.timed_out += 1
+                raise AdmissionRejectedError(
+                    f"No {self.lane} slot became free within {timeout_at - now:.2f}s; try again later"
+                ) from None
+            raise
+
+    def _release(self, client: str, held_seconds: Optional[float]) -> None:
+        self._running -= 1
+        remaining = self._running_by_client[client] - 1
+        if remaining:
+            self._running_by_client[client] = remaining
+        else:
+            del self._running_by_client[client]
+        if held_seconds is not None:
+            if self._average_hold_seconds:
+                self._average_hold_seconds += HOLD_TIME_SMOOTHING * (held_seconds - self._average_hold_seconds)
+            else:
+                self._average_hold_seconds = held_seconds
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        index = 0
+        while self._running < self.max_concurrency and index < len(self._waiters):
+            waiter = self._waiters[index]
+            if waiter.future.done():
+                # Cancelled or timed out, and its caller has not run yet to remove it
+                del self._waiters[index]
+                continue
+            if not self._can_run(waiter.client):
+                index += 1
+                continue
+            del self._waiters[index]
+            self._start(waiter.client)
+            self._observe_wait(time.monotonic() - waiter.queued_at)
+            waiter.future.set_result(None)
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        index = bisect.bisect_left(self._waiters, waiter)
+        if index < len(self._waiters) and self._waiters[index] is waiter:
+            del self._waiters[index]
+
+    def _observe_wait(self, seconds: float) -> None:
+        self._wait_seconds_total += seconds
+        if seconds * 1000 > self._metrics.max_wait_ms:
+            self._metrics.max_wait_ms = seconds * 1000
+        if self._registry is not None:
+            self._registry.admission_wait.observe(seconds, self.lane)
+
+class ClientIdentityMiddleware:
+    """
+    ASGI middleware that sets current_client for each HTTP request and WebSocket session:
+    the X-Client-Id header when sent (e.g. by a gateway serving several agents), otherwise
+    the peer address. The header is not authenticated; the global limit still applies.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        token = current_client.set(client_id(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_client.reset(token)
+
+def client_id(scope) -> str:
+    for name, value in scope.get("headers") or ():
+        if name == CLIENT_ID_HEADER and value:
+            return value.decode("latin-1")[:128]
+    peer = scope.get("client")
+    return peer[0] if peer else "unknown"
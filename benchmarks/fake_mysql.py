@@ -0,0 +1,134 @@
+"""
+In-process stand-in for aiomysql used by the benchmarks.
+FakePool/FakeConnection/FakeCursor implement the subset of the aiomysql
+pool, connection and cursor protocol that DatabaseService relies on.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Responder = Callable[[str, Optional[Any]], Tuple[List[str], List[Sequence[Any]]]]
+
+class FakeCursor:
+    def __init__(self, responder: Responder, as_dict: bool, latency: float = 0.0):
+        self._responder = responder
+        self._as_dict = as_dict
+        self._latency = latency
+        self._rows: List[Any] = []
+        self._position = 0
+        self.description = None
+        self.rowcount = 0
+
+    def __await__(self):
+        # Supports both `await connection.cursor()` and `async with connection.cursor()`
+        if False:
+            yield
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def execute(self, query: str, args: Optional[Any] = None) -> int:
+        if self._latency:
+            # Stands in for the network round trip and server time of a real statement
+            await asyncio.sleep(self._latency)
+        columns, rows = self._responder(query, args)
+        # A column is a name (reported as VARCHAR) or a (name, MySQL type code) pair
+        self.description = [
+            (column, 253, None, None, None, None, True) if isinstance(column, str) else (column[0], column[1], None, None, None, None, True)
+            for column in columns
+        ] or None
+        columns = [column[0] for column in self.description or ()]
+        if self._as_dict:
+            self._rows = [dict(zip(columns, row)) for row in rows]
+        else:
+            self._rows = [tuple(row) for row in rows]
+        self._position = 0
+        self.rowcount = len(self._rows)
+        return self.rowcount
+
+    async def fetchone(self):
+        if self._position >= len(self._rows):
+            return None
+        row = self._rows[self._position]
+        self._position += 1
+        return row
+
+    async def fetchmany(self, size: int = 1):
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    async def fetchall(self):
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    async def close(self) -> None:
+        self._rows = []
+
+class FakeConnection:
+    def __init__(self, responder: Responder, latency: float = 0.0):
+        self._responder = responder
+        self._latency = latency
+        self.closed = False
+
+    def thread_id(self) -> int:
+        return id(self)
+
+    def cursor(self, cursor_class: Optional[type] = None) -> FakeCursor:
+        as_dict = cursor_class is not None and "Dict" in cursor_class.__name__
+        return FakeCursor(self._responder, as_dict, self._latency)
+
+    def close(self) -> None:
+        self.closed = True
+
+class FakePool:
+    """latency (seconds) is added to every execute() to simulate a remote server."""
+    def __init__(self, responder: Responder, latency: float = 0.0):
+        self._responder = responder
+        self._latency = latency
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self._responder, self._latency)
+
+    async def kill_query(self, thread_id: int) -> None:
+        pass
+
+    def metrics(self) -> Dict[str, Any]:
+        return {}
+
+COLUMN_FIELDS = ["TABLE_NAME", "COLUMN_NAME", "DATA_TYPE", "IS_NULLABLE"]
+KEY_FIELDS = ["TABLE_NAME", "CONSTRAINT_TYPE", "CONSTRAINT_NAME", "COLUMN_NAME", "REFERENCED_TABLE_NAME", "REFERENCED_COLUMN_NAME"]
+
+def synthetic_schema(table_count: int, columns_per_table: int = 12, foreign_keys_per_table: int = 2):
+    """
+    Generates INFORMATION_SCHEMA rows for a synthetic database.
+    Every table has an `id` primary key and references the tables before it by foreign key.
+    """
+    column_rows: List[Tuple] = []
+    key_rows: List[Tuple] = []
+    for t in range(table_count):
+        table = f"table_{t:05d}"
+        column_rows.append((table, "id", "bigint", "NO"))
+        for c in range(1, columns_per_table):
+            column_rows.append((table, f"column_{c:03d}", "varchar", "YES"))
+        key_rows.append((table, "PRIMARY KEY", "PRIMARY", "id", None, None))
+        for f in range(min(foreign_keys_per_table, columns_per_table - 1)):
+            referenced = f"table_{(t - f - 1) % table_count:05d}"
+            key_rows.append((table, "FOREIGN KEY", f"fk_{table}_{f}", f"column_{f + 1:03d}", referenced, "id"))
+    return column_rows, key_rows
+
+def schema_responder(column_rows: List[Tuple], key_rows: List[Tuple]) -> Responder:
+    """Answers the schema introspection queries issued by DatabaseService."""
+    def respond(query: str, args: Optional[Any]):
+        if "INFORMATION_SCHEMA.COLUMNS" in query:
+            return COLUMN_FIELDS, column_rows
+        if "INFORMATION_SCHEMA.TABLE_CONSTRAINTS" in query:
+            return KEY_FIELDS, key_rows
+        return [], []
+    return respond
@@ -0,0 +1,238 @@
+"""
+Load test for the HTTP application: replays a trace against /mcp and the REST endpoints
+at increasing concurrency and reports throughput, p50/p95/p99 latency and peak RSS.
+
+    python -m benchmarks.load_test [--trace benchmarks/traces/mixed.jsonl] [--concurrency 1 8 32]
+    python -m benchmarks.load_test --connection-string "Server=localhost;Database=test;..."
+    python -m benchmarks.load_test --url http://localhost:8000
+
+A trace is a JSON Lines file. A line holding a JSON-RPC request (or a batch array) is
+POSTed to /mcp; any other line is {"path": ..., "body": ..., "headers": ...} and is sent
+as a POST when it has a body, otherwise as a GET. Lines are replayed round-robin until
+--requests requests have completed.
+
+By default the application runs in-process (no sockets) against the fake aiomysql pool
+of benchmarks/fake_mysql.py serving a synthetic schema, with --db-latency-ms added to
+every statement. --connection-string runs it in-process against a real MySQL/MariaDB
+server instead, and --url drives an already running server over HTTP (peak RSS then
+covers only this client). --save writes the results as JSON; --baseline compares
+against a saved run and exits non-zero when throughput drops or p95 latency grows by
+more than --max-regression. --clients spreads the workers over that many client
+identities (X-Client-Id), which the per-client admission limits apply to.
+
+Requires httpx, which the server itself does not: pip install -r benchmarks/requirements.txt
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fake_mysql import Responder, schema_responder, synthetic_schema
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak RSS is then not reported
+    resource = None
+
+TABLE_FIELDS = ["TABLE_NAME", "CREATE_TIME", "UPDATE_TIME"]
+
+class TraceEntry:
+    def __init__(self, line: Any):
+        if isinstance(line, list) or "jsonrpc" in line:
+            self.path, self.body, self.headers = "/mcp", line, {}
+            self.label = "batch" if isinstance(line, list) else line.get("method", "?")
+        else:
+            self.path, self.body, self.headers = line["path"], line.get("body"), line.get("headers", {})
+            self.label = f"{'POST' if self.body is not None else 'GET'} {self.path}"
+
+def load_trace(path: str) -> List[TraceEntry]:
+    with open(path, encoding="utf-8") as trace_file:
+        entries = [TraceEntry(json.loads(line)) for line in trace_file if line.strip()]
+    if not entries:
+        raise SystemExit(f"Trace {path} has no requests")
+    return entries
+
+def fake_responder(table_count: int, row_count: int) -> Responder:
+    """Serves schema introspection, change-detection probes and a fixed result for any other query."""
+    column_rows, key_rows = synthetic_schema(table_count)
+    schema = schema_responder(column_rows, key_rows)
+    table_rows = [(f"table_{t:05d}", "2024-01-01 00:00:00", None) for t in range(table_count)]
+    result_columns = ["id", "column_001", "column_002"]
+    result_rows = [(i, f"value-{i}", None) for i in range(row_count)]
+
+    def respond(query: str, args: Optional[Any]):
+        columns, rows = schema(query, args)
+        if columns:
+            return columns, rows
+        if "INFORMATION_SCHEMA.TABLES" in query:
+            return TABLE_FIELDS, table_rows
+        return result_columns, result_rows
+    return respond
+
+def is_error(response: httpx.Response) -> bool:
+    if response.status_code >= 400:
+        return True
+    if response.headers.get("content-type", "").startswith("application/json") and response.content:
+        payload = response.json()
+        messages = payload if isinstance(payload, list) else [payload]
+        return any(isinstance(message, dict) and message.get("error") for message in messages)
+    return False
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(fraction * len(sorted_values) + 0.5))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+async def run_level(client: httpx.AsyncClient, trace: List[TraceEntry], concurrency: int, requests: int, clients: int = 1) -> Dict[str, Any]:
+    samples: List[Tuple[str, float, bool]] = []
+    next_index = 0
+
+    async def worker(number: int) -> None:
+        nonlocal next_index
+        identity = {"X-Client-Id": f"load-test-{number % clients}"} if clients > 1 else {}
+        while next_index < requests:
+            entry = trace[next_index % len(trace)]
+            next_index += 1
+            headers = {**identity, **entry.headers}
+            started = time.perf_counter()
+            try:
+                if entry.body is not None:
+                    response = await client.post(entry.path, json=entry.body, headers=headers)
+                else:
+                    response = await client.get(entry.path, headers=headers)
+                failed = is_error(response)
+            except httpx.HTTPError:
+                failed = True
+            samples.append((entry.label, time.perf_counter() - started, failed))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    def summarize(selected: List[Tuple[str, float, bool]]) -> Dict[str, Any]:
+        latencies = sorted(sample[1] for sample in selected)
+        return {
+            "requests": len(selected),
+            "errors": sum(1 for sample in selected if sample[2]),
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+
+    summary = summarize(samples)
+    summary["concurrency"] = concurrency
+    summary["throughput"] = len(samples) / elapsed
+    summary["by_label"] = {label: summarize([s for s in samples if s[0] == label]) for label in sorted({s[0] for s in samples})}
+    return summary
+
+def print_level(summary: Dict[str, Any], verbose: bool) -> None:
+    print(f"{summary['concurrency']:>11}{summary['requests']:>10}{summary['errors']:>8}{summary['throughput']:>12.0f}"
+          f"{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}{summary['p99_ms']:>10.2f}")
+    if verbose:
+        for label, stats in summary["by_label"].items():
+            print(f"{'':>11}  {label:<28}{stats['requests']:>8}{stats['errors']:>8}"
+                  f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+def compare(levels: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {level["concurrency"]: level for level in json.load(baseline_file)["levels"]}
+    failures = []
+    for level in levels:
+        previous = baseline.get(level["concurrency"])
+        if previous is None:
+            continue
+        if level["throughput"] < previous["throughput"] * (1 - max_regression):
+            failures.append(f"concurrency {level['concurrency']}: throughput {level['throughput']:.0f}/s vs {previous['throughput']:.0f}/s")
+        if level["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            failures.append(f"concurrency {level['concurrency']}: p95 {level['p95_ms']:.2f}ms vs {previous['p95_ms']:.2f}ms")
+    return failures
+
+def in_process_client(args: argparse.Namespace) -> Tuple[httpx.AsyncClient, Any]:
+    """Imports the application configured for the chosen backend; returns the client and the module."""
+    os.environ["DB_CONNECTION_STRING"] = args.connection_string or "Server=fake;Database=bench"
+    import main as application
+    if not args.log:
+        logging.getLogger().setLevel(logging.WARNING)
+    if not args.connection_string:
+        from benchmarks.fake_mysql import FakePool
+        application.db_pool = FakePool(fake_responder(args.tables, args.rows), args.db_latency_ms / 1000)
+        application.db_service.pool = application.db_pool
+    transport = httpx.ASGITransport(app=application.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://load-test"), application
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    trace = load_trace(args.trace)
+    application = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=httpx.Limits(max_connections=max(args.concurrency)))
+    else:
+        client, application = in_process_client(args)
+        if args.connection_string:
+            # The ASGI transport does not run the lifespan, so the pool is opened here
+            await application.db_pool.open()
+
+    levels = []
+    try:
+        await run_level(client, trace, min(args.concurrency), args.warmup, args.clients)
+        print(f"{'concurrency':>11}{'requests':>10}{'errors':>8}{'req/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for concurrency in args.concurrency:
+            summary = await run_level(client, trace, concurrency, args.requests, args.clients)
+            summary["peak_rss_mb"] = peak_rss_mb()
+            levels.append(summary)
+            print_level(summary, args.verbose)
+    finally:
+        await client.aclose()
+        if application is not None and args.connection_string:
+            await application.db_pool.close()
+    return levels
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", default=os.path.join(os.path.dirname(__file__), "traces", "mixed.jsonl"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per concurrency level.")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=1, help="Number of client identities the workers are spread over.")
+    parser.add_argument("--url", help="Drive a running server instead of the in-process application.")
+    parser.add_argument("--connection-string", help="Run in-process against this MySQL server instead of the fake.")
+    parser.add_argument("--tables", type=int, default=200, help="Tables of the fake schema.")
+    parser.add_argument("--rows", type=int, default=100, help="Rows returned by the fake for every query.")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="Simulated time per statement of the fake.")
+    parser.add_argument("--verbose", action="store_true", help="Also report latency per method / path.")
+    parser.add_argument("--log", action="store_true", help="Keep INFO logging enabled (measures logging cost too).")
+    parser.add_argument("--save", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare with results saved by --save and fail on regressions.")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    levels = asyncio.run(run(args))
+    rss = peak_rss_mb()
+    print(f"peak RSS: {f'{rss:.1f} MB' if rss is not None else 'n/a'}{' (client only)' if args.url else ''}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as output:
+            json.dump({"trace": args.trace, "levels": levels}, output, indent=2)
+    if not args.baseline:
+        return 0
+    failures = compare(levels, args.baseline, args.max_regression)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Measures the client-side cost of a hot point lookup issued with inlined literals
+versus as a parameterized template. Rows are served by an in-process fake cursor,
+so the numbers exclude the network and the server.
+
+    python -m benchmarks.parameterized_query_benchmark [--iterations 20000]
+
+"inlined literals" sends a different query text for every id, so each call is
+tokenized and analyzed again; "parameterized" reuses one template whose analysis
+is cached. The fake cursor does not escape values, so the driver's per-value
+escaping is not included.
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from benchmarks.fake_mysql import FakePool
+from config import DatabaseOptions
+from database_service import DatabaseService
+
+LOOKUP = "SELECT id, name, status, created_at FROM customers WHERE id = {} AND status <> 'deleted'"
+
+def make_service() -> DatabaseService:
+    options = DatabaseOptions(connection_string="server=fake", command_timeout_seconds=0)
+    return DatabaseService(options, FakePool(lambda query, args: (["id", "name", "status", "created_at"], [(1, "a", "active", None)])))
+
+async def run(iterations: int, lookup: Callable[[int], Awaitable]) -> float:
+    for i in range(min(iterations, 1000)):
+        await lookup(-1 - i)
+    started = time.perf_counter()
+    for i in range(iterations):
+        await lookup(i)
+    return (time.perf_counter() - started) / iterations
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    service = make_service()
+    # Unique ids per scenario so inlined queries never hit the rewrite cache
+    offset = args.iterations * 10
+    scenarios = [
+        ("inlined literals", lambda i: service.execute_query(LOOKUP.format(offset + i))),
+        ("parameterized", lambda i: service.execute_query(LOOKUP.format("%s"), params=[i])),
+    ]
+
+    print(f"{'scenario':<20}{'us/call':>10}")
+    for name, lookup in scenarios:
+        seconds = asyncio.run(run(args.iterations, lookup))
+        print(f"{name:<20}{seconds * 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    main()
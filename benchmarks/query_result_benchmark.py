@@ -0,0 +1,96 @@
+"""
+Compares the query result representations for memory, build time, serialization
+time and payload size. Rows are served by an in-process fake cursor.
+
+    python -m benchmarks.query_result_benchmark [--rows 10000 100000 1000000]
+
+"legacy" reproduces the original list-of-dicts path: DictCursor rows copied into new
+dicts and validated into QueryResult. The other formats go through
+DatabaseService.execute_query on the plain cursor.
+"""
+import aiomysql.cursors
+import argparse
+import asyncio
+import datetime
+import decimal
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, List, Tuple
+
+from benchmarks.fake_mysql import FakePool
+from config import DatabaseOptions
+from database_service import DatabaseService
+from models.query_result import QueryResult, QueryResultFormat
+from query_result_encoding import arrow_available
+from serialization import json_default
+
+COLUMNS = ["id", "name", "amount", "created_at", "parent_id", "status"]
+
+def synthetic_rows(count: int) -> List[Tuple[Any, ...]]:
+    base = datetime.datetime(2024, 1, 1)
+    return [
+        (i, f"name-{i}", decimal.Decimal(i) / 100, base + datetime.timedelta(seconds=i), i // 2 if i % 3 else None, "active")
+        for i in range(count)
+    ]
+
+def make_service(rows: List[Tuple[Any, ...]]) -> DatabaseService:
+    def respond(query, args):
+        if query.startswith("SET"):
+            return [], []
+        return COLUMNS, rows
+    options = DatabaseOptions(connection_string="server=fake", command_timeout_seconds=0)
+    return DatabaseService(options, FakePool(respond))
+
+async def legacy_execute(service: DatabaseService) -> QueryResult:
+    async with service.pool.acquire() as connection:
+        async with connection.cursor(aiomysql.cursors.DictCursor) as cursor:
+            await cursor.execute("SELECT")
+            columns = [desc[0] for desc in cursor.description]
+            rows = await cursor.fetchall()
+            formatted_rows = [{k: (None if v is None else v) for k, v in row.items()} for row in rows]
+    return QueryResult(columns=columns, rows=formatted_rows, records_affected=len(rows))
+
+def build_function(service: DatabaseService, name: str) -> Callable[[], Any]:
+    if name == "legacy":
+        return lambda: asyncio.run(legacy_execute(service))
+    result_format = QueryResultFormat(name)
+    return lambda: asyncio.run(service.execute_query("SELECT", result_format))
+
+def serialize(result: Any) -> bytes:
+    return json.dumps(result.model_dump(), default=json_default, separators=(",", ":")).encode("utf-8")
+
+def measure(build: Callable[[], Any]) -> Tuple[float, float, int, float]:
+    gc.collect()
+    started = time.perf_counter()
+    result = build()
+    built = time.perf_counter()
+    payload = serialize(result)
+    serialized = time.perf_counter()
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    serialize(result)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built - started, serialized - built, len(payload), peak / 2**20
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    formats = ["legacy", "rows", "tabular", "columnar"] + (["arrow"] if arrow_available() else [])
+    print(f"{'rows':>9} {'format':<10}{'build ms':>11}{'serialize ms':>14}{'payload MB':>12}{'peak MB':>10}")
+    for count in args.rows:
+        service = make_service(synthetic_rows(count))
+        for name in formats:
+            build_seconds, serialize_seconds, payload_bytes, peak_mb = measure(build_function(service, name))
+            print(f"{count:>9} {name:<10}{build_seconds * 1e3:>11.1f}{serialize_seconds * 1e3:>14.1f}"
+                  f"{payload_bytes / 2**20:>12.2f}{peak_mb:>10.1f}")
+
+if __name__ == "__main__":
+    main()
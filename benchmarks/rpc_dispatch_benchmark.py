@@ -0,0 +1,65 @@
+"""
+Measures per-request dispatch overhead of the JSON-RPC pipeline for `ping`.
+
+    python -m benchmarks.rpc_dispatch_benchmark [--iterations 100000]
+
+"direct handler" calls PingHandler.handle without any pipeline, "prebuilt router"
+dispatches through a router built once (as the application does), and
+"router per request" rebuilds the registry, handlers, behaviors and router for every
+call, as the original FastAPI dependency did.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from features.prompts.prompt_registry import PromptRegistry
+from rpc.behaviors.exception_behavior import JsonRpcExceptionBehavior
+from rpc.behaviors.logging_behavior import JsonRpcLoggingBehavior
+from rpc.behaviors.validation_behavior import JsonRpcValidationBehavior
+from rpc.handlers.initialize_handler import InitializeHandler
+from rpc.handlers.ping_handler import PingHandler
+from rpc.handlers.prompts_list_handler import PromptsListHandler
+from rpc.json_rpc_interfaces import JsonRpcRequest
+from rpc.json_rpc_router import JsonRpcRouter
+
+def build_router() -> JsonRpcRouter:
+    return JsonRpcRouter(
+        handlers=[PingHandler(), InitializeHandler(), PromptsListHandler(PromptRegistry())],
+        behaviors=[JsonRpcExceptionBehavior(), JsonRpcLoggingBehavior(), JsonRpcValidationBehavior()]
+    )
+
+async def run(iterations: int, dispatch: Callable[[JsonRpcRequest], Awaitable]) -> float:
+    request = JsonRpcRequest(method="ping", id=1)
+    for _ in range(min(iterations, 1000)):
+        await dispatch(request)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await dispatch(request)
+    return (time.perf_counter() - started) / iterations
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--log", action="store_true", help="Keep INFO logging enabled (measures logging cost too).")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.log else logging.WARNING)
+
+    ping = PingHandler()
+    router = build_router()
+    scenarios = [
+        ("direct handler", ping.handle),
+        ("prebuilt router", router.handle_async),
+        ("router per request", lambda request: build_router().handle_async(request)),
+    ]
+
+    baseline = None
+    print(f"{'scenario':<22}{'us/call':>10}{'overhead us':>14}")
+    for name, dispatch in scenarios:
+        seconds = asyncio.run(run(args.iterations, dispatch))
+        baseline = seconds if baseline is None else baseline
+        print(f"{name:<22}{seconds * 1e6:>10.2f}{(seconds - baseline) * 1e6:>14.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmarks schema assembly in DatabaseService.get_database_schema against synthetic
+schemas served by an in-process fake cursor, so only assembly cost is measured.
+
+    python -m benchmarks.schema_assembly_benchmark [--check]
+
+With --check the script exits non-zero when the per-table cost grows by more than
+--max-growth between the smallest and the largest schema, or the per-column cost grows
+by more than --max-growth between narrow and wide tables, i.e. when assembly is no
+longer linear in the number of rows.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import List, Tuple
+
+from benchmarks.fake_mysql import FakePool, schema_responder, synthetic_schema
+from config import DatabaseOptions
+from database_service import DatabaseService
+
+def measure(table_count: int, columns_per_table: int, foreign_keys_per_table: int, repeats: int) -> float:
+    """Returns the best wall-clock time in seconds for one get_database_schema call."""
+    column_rows, key_rows = synthetic_schema(table_count, columns_per_table, foreign_keys_per_table)
+    options = DatabaseOptions(connection_string="server=fake")
+    service = DatabaseService(options, FakePool(schema_responder(column_rows, key_rows)))
+
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        tables = asyncio.run(service.get_database_schema())
+        best = min(best, time.perf_counter() - started)
+    assert len(tables) == table_count
+    return best
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--columns", type=int, default=12, help="Columns per table for the table-count scenarios.")
+    parser.add_argument("--wide-columns", type=int, nargs=2, default=[20, 1000], help="Narrow and wide column counts.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="Fail when the cost is not linear.")
+    parser.add_argument("--max-growth", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<28}{'total ms':>12}{'us/table':>12}{'us/column':>12}")
+    per_table: List[Tuple[int, float]] = []
+    for table_count in args.tables:
+        elapsed = measure(table_count, args.columns, 2, args.repeats)
+        per_table.append((table_count, elapsed / table_count))
+        print(f"{f'{table_count} tables x {args.columns} cols':<28}{elapsed * 1e3:>12.2f}"
+              f"{elapsed / table_count * 1e6:>12.2f}{elapsed / (table_count * args.columns) * 1e6:>12.3f}")
+
+    per_column: List[Tuple[int, float]] = []
+    for columns in args.wide_columns:
+        # Every non-key column is a foreign key, the worst case for per-table lookups
+        elapsed = measure(100, columns, columns - 1, args.repeats)
+        per_column.append((columns, elapsed / (100 * columns)))
+        print(f"{f'100 tables x {columns} cols (all FK)':<28}{elapsed * 1e3:>12.2f}"
+              f"{elapsed / 100 * 1e6:>12.2f}{elapsed / (100 * columns) * 1e6:>12.3f}")
+
+    if not args.check:
+        return 0
+
+    failures = []
+    table_growth = per_table[-1][1] / per_table[0][1]
+    if table_growth > args.max_growth:
+        failures.append(f"per-table cost grew {table_growth:.2f}x from {per_table[0][0]} to {per_table[-1][0]} tables")
+    column_growth = per_column[-1][1] / per_column[0][1]
+    if column_growth > args.max_growth:
+        failures.append(f"per-column cost grew {column_growth:.2f}x from {per_column[0][0]} to {per_column[-1][0]} columns")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Compares serialization throughput of a query/execute response for large results.
+
+    python -m benchmarks.serialization_benchmark [--rows 10000 100000]
+
+"response_model" reproduces the previous /mcp path: FastAPI validates the returned
+JsonRpcResponse against the response model, converts it to JSON-compatible values
+and renders it with the json module. "dumps" is serialization.dumps as used by
+FastJSONResponse, once with the json module fallback and once with orjson when it
+is installed.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import time
+from typing import Any, Callable, List, Tuple
+
+from pydantic import TypeAdapter
+
+import serialization
+from benchmarks.query_result_benchmark import make_service, synthetic_rows
+from models.query_result import QueryResultFormat
+from rpc.json_rpc_interfaces import JsonRpcResponse
+
+response_adapter = TypeAdapter(JsonRpcResponse)
+
+def response_model_path(response: JsonRpcResponse) -> bytes:
+    validated = response_adapter.validate_python(response)
+    content = response_adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def json_module_dumps(response: JsonRpcResponse) -> bytes:
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.dumps(response)
+    finally:
+        serialization.orjson = orjson
+
+def measure(serialize: Callable[[Any], bytes], response: JsonRpcResponse, repeats: int) -> Tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        size = len(serialize(response))
+        best = min(best, time.perf_counter() - started)
+    return best, size
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    serializers: List[Tuple[str, Callable[[Any], bytes]]] = [
+        ("response_model", response_model_path),
+        ("dumps (json)", json_module_dumps),
+    ]
+    if serialization.orjson is not None:
+        serializers.append(("dumps (orjson)", serialization.dumps))
+
+    print(f"{'rows':>9} {'format':<10}{'serializer':<16}{'ms':>10}{'rows/s':>12}{'MB/s':>9}")
+    for count in args.rows:
+        service = make_service(synthetic_rows(count))
+        for result_format in (QueryResultFormat.ROWS, QueryResultFormat.TABULAR):
+            result = asyncio.run(service.execute_query("SELECT", result_format))
+            response = JsonRpcResponse(id=1, result=result)
+            for name, serialize in serializers:
+                seconds, size = measure(serialize, response, args.repeats)
+                print(f"{count:>9} {result_format.value:<10}{name:<16}{seconds * 1e3:>10.1f}"
+                      f"{count / seconds:>12.0f}{size / 2**20 / seconds:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures the cost of SQL classification/rewrite for typical and pathological queries,
+uncached (first sight of a query) and cached (repeated query).
+
+    python -m benchmarks.sql_rewrite_benchmark [--repeats 200]
+"""
+import argparse
+import time
+from typing import Callable, List, Tuple
+
+from config import DatabaseOptions
+from sql_rewriter import SqlRewriter
+
+def queries() -> List[Tuple[str, str]]:
+    return [
+        ("simple select", "SELECT id, name FROM customers WHERE status = 'active'"),
+        ("clamped limit", "SELECT * FROM orders ORDER BY created_at DESC LIMIT 100000"),
+        ("join + cte", """
+            WITH recent AS (SELECT customer_id, COUNT(*) AS n FROM orders WHERE created_at > NOW() - INTERVAL 7 DAY GROUP BY customer_id)
+            SELECT c.id, c.name, r.n FROM customers c JOIN recent r ON r.customer_id = c.id
+            LEFT JOIN regions g ON g.id = c.region_id WHERE c.status IN ('a', 'b') ORDER BY r.n DESC
+        """),
+        ("union", "(SELECT id FROM a WHERE x = 1) UNION ALL (SELECT id FROM b WHERE y = 2) ORDER BY id"),
+        ("10k IN list", "SELECT * FROM events WHERE id IN (" + ", ".join(str(i) for i in range(10000)) + ")"),
+        ("200-deep nesting", "SELECT " + "(" * 200 + "1" + ")" * 200 + " FROM dual"),
+        ("1 MB string literal", "SELECT * FROM notes WHERE body = '" + "x" * (1 << 20) + "'"),
+        ("2k comments", "SELECT a\n" + "".join(f"-- comment {i}\n, c{i} /* inline */\n" for i in range(2000)) + "FROM t"),
+        ("500-way union", " UNION ALL ".join(f"SELECT {i} AS n FROM t{i}" for i in range(500))),
+    ]
+
+def best_of(repeats: int, action: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    options = DatabaseOptions(connection_string="server=fake")
+    print(f"{'query':<22}{'length':>10}{'uncached us':>14}{'cached us':>12}")
+    for name, query in queries():
+        repeats = args.repeats if len(query) < 100000 else max(1, args.repeats // 20)
+        uncached = best_of(repeats, lambda: SqlRewriter(options).rewrite(query))
+        rewriter = SqlRewriter(options)
+        rewriter.rewrite(query)
+        cached = best_of(repeats, lambda: rewriter.rewrite(query))
+        print(f"{name:<22}{len(query):>10}{uncached * 1e6:>14.1f}{cached * 1e6:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,44 @@
+from functools import cached_property
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
+CONNECTION_STRING_KEYS = {
+    "server": "host", "host": "host", "data source": "host", "datasource": "host",
+    "port": "port",
+    "uid": "user", "user": "user", "user id": "user", "userid": "user", "username": "user",
+    "pwd": "password", "password": "password",
+    "database": "database", "db": "database", "initial catalog": "database",
+    "charset": "charset", "character set": "charset",
+    "connect timeout": "connect_timeout", "connection timeout": "connect_timeout", "connecttimeout": "connect_timeout"
+}
+
+class ConnectionSettings(BaseModel):
+    """
+    Typed connection parameters parsed from an ADO.NET-style connection string
+    (e.g. "server=localhost;port=3306;database=app;uid=user;pwd=secret").
+    """
+    host: str = "localhost"
+    port: int = 3306
+    user: str = "root"
+    password: str = ""
+    database: Optional[str] = None
+    charset: str = "utf8mb4"
+    connect_timeout: int = 10
+
+    @classmethod
+    def parse(cls, connection_string: str) -> "ConnectionSettings":
+        values = {}
+        for part in connection_string.split(";"):
+            if not part.strip():
+                continue
+            key, separator, value = part.partition("=")
+            if not separator:
+                raise ValueError(f"Invalid connection string segment '{part.strip()}', expected key=value")
+            field = CONNECTION_STRING_KEYS.get(key.strip().lower())
+            if field is not None:
+                values[field] = value.strip()
+        return cls.model_validate(values)
+
 class DatabaseOptions(BaseModel):
     """
     Configuration options for connecting to a MySQL database.
@@ -9,3 +48,47 @@ class DatabaseOptions(BaseModel):
     require_limit: bool = Field(True, description="Requires a LIMIT clause and appends one if missing.")
     max_rows: int = Field(500, description="Maximum rows to return when a LIMIT is required.")
     command_timeout_seconds: int = Field(30, description="Command timeout in seconds.")
+    pool_min_size: int = Field(1, description="Minimum number of connections kept open in the pool.")
+    pool_max_size: int = Field(10, description="Maximum number of connections the pool may open.")
+    pool_recycle_seconds: int = Field(3600, description="Idle connections older than this are closed and replaced. 0 disables recycling.")
+    pool_pre_ping: bool = Field(True, description="Pings connections before handing them out and replaces dead ones.")
+    pool_acquire_timeout_seconds: float = Field(10.0, description="Maximum time to wait for a free connection.")
+    pool_max_waiters: int = Field(100, description="Maximum number of callers allowed to wait for a connection before new callers are rejected.")
+    schema_cache_ttl_seconds: int = Field(300, description="Maximum age of the cached schema before it is fully reloaded. 0 disables caching.")
+    schema_probe_interval_seconds: int = Field(5, description="Minimum interval between change-detection probes of the cached schema.")
+    stream_batch_size: int = Field(500, description="Number of rows fetched per round trip when streaming query results.")
+    sql_cache_size: int = Field(1024, description="Number of classified/rewritten queries kept in the SQL rewrite LRU cache.")
+    query_cache_ttl_seconds: int = Field(0, description="Maximum age of a cached query result. 0 disables the query result cache.")
+    query_cache_max_bytes: int = Field(64 * 1024 * 1024, description="Memory budget of the query result cache; least recently used results are evicted beyond it.")
+    query_cache_max_entry_bytes: int = Field(4 * 1024 * 1024, description="Results larger than this are never cached.")
+    query_cache_probe_interval_seconds: float = Field(1.0, description="Minimum interval between change-detection probes used to invalidate cached results.")
+    shared_cache_dir: Optional[str] = Field(None, description="Directory of the cache store shared by worker processes (ideally under /dev/shm). Unset keeps the schema and result caches per process.")
+    shared_cache_max_bytes: int = Field(256 * 1024 * 1024, description="Size budget of the shared cache store; the oldest entries are removed beyond it.")
+    admission_max_concurrency: int = Field(8, description="Maximum number of queries and streams running at once; keep it below pool_max_size so metadata lookups always find a connection. 0 disables admission control.")
+    admission_max_per_client: int = Field(4, description="Maximum number of queries and streams one client may run at once (0 = only the global limit).")
+    admission_metadata_concurrency: int = Field(2, description="Maximum number of schema and table lookups running at once; they have their own lane and never wait behind queries.")
+    admission_queue_size: int = Field(100, description="Maximum number of operations per lane waiting to be admitted before new ones are rejected.")
+    admission_queue_timeout_seconds: float = Field(10.0, description="Maximum time an operation waits to be admitted; callers whose estimated wait is longer are rejected right away.")
+    cost_guard_max_rows_examined: int = Field(0, description="Queries whose EXPLAIN estimates more rows examined than this are rejected before they run (0 = no limit).")
+    cost_guard_max_result_rows: int = Field(0, description="Estimated result rows (after LIMIT) above which cost_guard_action applies (0 = no limit).")
+    cost_guard_max_result_bytes: int = Field(0, description="Estimated result size in bytes above which cost_guard_action applies (0 = no limit).")
+    cost_guard_action: Literal["reject", "limit", "stream"] = Field("reject", description="What to do with a query whose estimated result is too large: reject it, tighten its LIMIT to fit, or answer it as a stream.")
+    cost_guard_cache_size: int = Field(1024, description="Number of query shapes whose EXPLAIN estimate is kept.")
+    cost_guard_cache_ttl_seconds: int = Field(300, description="Maximum age of a cached EXPLAIN estimate; plans change as tables grow.")
+
+    @cached_property
+    def connection_settings(self) -> ConnectionSettings:
+        """The connection string, parsed once."""
+        return ConnectionSettings.parse(self.connection_string)
+
+class RpcOptions(BaseModel):
+    """
+    Configuration options for the JSON-RPC endpoint.
+    """
+    batch_max_concurrency: int = Field(8, description="Maximum number of requests of a batch that are handled concurrently.")
+    batch_max_size: int = Field(100, description="Maximum number of requests accepted in a single batch.")
+    session_max_in_flight: int = Field(32, description="Maximum number of requests a persistent (stdio/WebSocket) session may have in flight before reading pauses.")
+    query_batch_max_statements: int = Field(50, description="Maximum number of statements accepted by a single query/batch call.")
+    query_batch_max_concurrency: int = Field(4, description="Maximum number of statements of a query/batch call running at once (each holds a pooled connection).")
+    query_batch_timeout_seconds: float = Field(30.0, description="Deadline of a query/batch call; statements still running when it passes are cancelled.")
+    slow_request_threshold_ms: float = Field(0, description="Requests slower than this are traced by database stage, logged and listed on /api/mysql/traces (0 = tracing disabled).")
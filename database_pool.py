@@ -0,0 +1,197 @@
+import aiomysql
+import asyncio
+import logging
+import pymysql
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from config import DatabaseOptions
+from models.pool_metrics import PoolMetrics
+
+logger = logging.getLogger(__name__)
+
+class PoolExhaustedError(Exception):
+    """Raised when a connection cannot be acquired from the pool in time."""
+    pass
+
+class DatabasePool:
+    """
+    Process-wide aiomysql connection pool.
+    Adds pre-ping validation, idle recycling, acquire timeouts, backpressure on
+    waiting callers and counters on top of aiomysql's pool. Session settings are
+    applied once when a connection is created rather than before every statement.
+    """
+    def __init__(self, options: DatabaseOptions):
+        self.options = options
+        # Parsed here so that a malformed connection string fails at startup
+        self.settings = options.connection_settings
+        self._pool: Optional[aiomysql.Pool] = None
+        self._known_connections: "weakref.WeakSet" = weakref.WeakSet()
+        self._waiting = 0
+        self._acquired = 0
+        self._created = 0
+        self._recycled = 0
+        self._ping_failures = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._killed_queries = 0
+
+    async def open(self) -> None:
+        if self._pool is not None:
+            return
+
+        self._pool = await aiomysql.create_pool(
+            minsize=self.options.pool_min_size,
+            maxsize=self.options.pool_max_size,
+            pool_recycle=-1, # Idle recycling is handled in acquire() so it can be counted
+            init_command=self._session_init_command(),
+            cursorclass=aiomysql.cursors.Cursor,
+            autocommit=True,
+            **self._connect_arguments()
+        )
+        logger.info(
+            f"Database pool opened to {self.settings.host}:{self.settings.port} "
+            f"(min={self.options.pool_min_size}, max={self.options.pool_max_size})"
+        )
+
+    async def close(self) -> None:
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        pool.close()
+        await pool.wait_closed()
+        logger.info("Database pool closed")
+
+    async def kill_query(self, thread_id: int) -> None:
+        """
+        Interrupts the statement running on the connection with the given thread id.
+        A short-lived side connection is used, so this works even when the pool is exhausted.
+        """
+        try:
+            connection = await aiomysql.connect(autocommit=True, **self._connect_arguments())
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("KILL QUERY %s", (thread_id,))
+            finally:
+                connection.close()
+            self._killed_queries += 1
+            logger.info(f"Killed query on connection {thread_id}")
+        except Exception as e:
+            logger.warning(f"Failed to kill query on connection {thread_id}: {e}")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiomysql.Connection]:
+        """Acquires a validated connection and returns it to the pool on exit."""
+        connection = await self._acquire_validated()
+        try:
+            yield connection
+        finally:
+            self._pool.release(connection)
+
+    async def _acquire_validated(self) -> aiomysql.Connection:
+        if self._pool is None:
+            raise RuntimeError("Database pool is not open")
+
+        if self._waiting >= self.options.pool_max_waiters:
+            self._rejected += 1
+            raise PoolExhaustedError(f"Too many callers waiting for a database connection ({self._waiting})")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.options.pool_acquire_timeout_seconds
+        self._waiting += 1
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolExhaustedError("Timed out waiting for a database connection")
+                try:
+                    connection = await asyncio.wait_for(self._pool.acquire(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    self._timeouts += 1
+                    raise PoolExhaustedError(
+                        f"Timed out after {self.options.pool_acquire_timeout_seconds}s waiting for a database connection"
+                    )
+
+                if connection not in self._known_connections:
+                    self._known_connections.add(connection)
+                    self._created += 1
+                    await self._configure_new_connection(connection)
+                elif (self.options.pool_recycle_seconds > 0
+                      and loop.time() - connection.last_usage > self.options.pool_recycle_seconds):
+                    self._recycled += 1
+                    self._discard(connection)
+                    continue
+
+                if self.options.pool_pre_ping:
+                    try:
+                        await connection.ping(reconnect=False)
+                    except Exception as e:
+                        logger.warning(f"Discarding pooled connection after failed ping: {e}")
+                        self._ping_failures += 1
+                        self._discard(connection)
+                        continue
+
+                self._acquired += 1
+                return connection
+        finally:
+            self._waiting -= 1
+
+    def _connect_arguments(self) -> Dict[str, Any]:
+        return dict(
+            host=self.settings.host,
+            port=self.settings.port,
+            user=self.settings.user,
+            password=self.settings.password,
+            db=self.settings.database,
+            charset=self.settings.charset,
+            connect_timeout=self.settings.connect_timeout
+        )
+
+    def _session_init_command(self) -> Optional[str]:
+        assignments = []
+        if self.options.command_timeout_seconds > 0:
+            # MAX_EXECUTION_TIME is in milliseconds and applies to SELECT statements
+            assignments.append(f"SESSION MAX_EXECUTION_TIME = {self.options.command_timeout_seconds * 1000}")
+        if self.options.enforce_read_only:
+            # Backs up the SQL rewriter: the server itself refuses writes on these sessions
+            assignments.append("SESSION transaction_read_only = ON")
+        return f"SET {', '.join(assignments)}" if assignments else None
+
+    async def _configure_new_connection(self, connection: aiomysql.Connection) -> None:
+        """
+        MySQL 8.0 caches the INFORMATION_SCHEMA.TABLES timestamps for information_schema_stats_expiry
+        (a day by default), which would hide writes from the schema and result cache probes.
+        The variable does not exist on older servers or MariaDB, which report live values.
+        """
+        server_info = connection.get_server_info() or ""
+        major = server_info.split(".", 1)[0]
+        if "mariadb" in server_info.lower() or not major.isdigit() or int(major) < 8:
+            return
+        try:
+            async with connection.cursor() as cursor:
+                await cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+        except pymysql.MySQLError as e:
+            logger.warning(f"Could not disable the INFORMATION_SCHEMA statistics cache; table changes may be detected late: {e}")
+
+    def _discard(self, connection: aiomysql.Connection) -> None:
+        connection.close()
+        self._pool.release(connection)
+
+    def metrics(self) -> PoolMetrics:
+        size = self._pool.size if self._pool is not None else 0
+        free = self._pool.freesize if self._pool is not None else 0
+        return PoolMetrics(
+            size=size,
+            free=free,
+            in_use=size - free,
+            waiting=self._waiting,
+            acquired=self._acquired,
+            created=self._created,
+            recycled=self._recycled,
+            ping_failures=self._ping_failures,
+            timeouts=self._timeouts,
+            rejected=self._rejected,
+            killed_queries=self._killed_queries
+        )
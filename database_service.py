@@ -1,40 +1,138 @@
 import aiomysql.cursors # Changed from pymysql.cursors
 import asyncio
-from typing import List, Dict, Any, Optional
+import base64
+import json
+import logging
+import pymysql
+import time
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Awaitable, List, Dict, Any, Optional, Sequence, Set, TypeVar
 
+from admission_control import LANE_METADATA, LANE_QUERY, PRIORITY_BATCH, PRIORITY_INTERACTIVE, AdmissionController
 from config import DatabaseOptions
+from database_pool import DatabasePool, PoolExhaustedError
+from metrics import MetricsRegistry
 from models.column_schema import ColumnSchema
 from models.foreign_key_schema import ForeignKeyColumn, ForeignKeySchema
 from models.table_schema import TableSchema
-from models.query_result import QueryResult
+from models.table_summary import TablePage, TableSummary
+from models.query_batch import QueryBatchItem, QueryBatchResult
+from models.query_request import QueryRequest
+from models.query_result import QueryResultFormat
+from query_cost_guard import QueryCostGuard
+from query_result_cache import CachedResult, QueryResultCache
+from query_result_encoding import AnyQueryResult, encode_query_result
+from serialization import decode_json_columns, json_column_indexes
+from shared_cache_store import SharedCacheStore
+from sql_rewriter import QueryParameters, QueryRejectedError, SqlRewriter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Server error raised when MAX_EXECUTION_TIME interrupts a statement
+ER_QUERY_TIMEOUT = 3024
+# The server-side MAX_EXECUTION_TIME normally fires first; the client-side deadline
+# is slightly longer and covers statements it does not apply to and stalled connections
+CLIENT_TIMEOUT_GRACE_SECONDS = 1.0
+
+class QueryTimeoutError(Exception):
+    """Raised when a statement exceeds command_timeout_seconds."""
+    pass
+
+class QueryStream:
+    """
+    A running query read through a server-side (unbuffered) cursor.
+    Rows are fetched batch_size at a time, so memory stays bounded regardless of the
+    result size. The pooled connection is held until the stream is exhausted or closed.
+    """
+    def __init__(self, exit_stack: AsyncExitStack, connection, cursor, batch_size: int):
+        self._exit_stack = exit_stack
+        self._connection = connection
+        self._cursor = cursor
+        self._batch_size = batch_size
+        self._exhausted = False
+        self.columns: List[str] = [desc[0] for desc in cursor.description] if cursor.description else []
+        self.row_count = 0
+        self.records_affected = cursor.rowcount if not cursor.description else 0
+        self._json_columns = [self.columns[index] for index in json_column_indexes(cursor.description)]
+
+    async def batches(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        try:
+            while self.columns:
+                rows = await self._cursor.fetchmany(self._batch_size)
+                if not rows:
+                    break
+                self.row_count += len(rows)
+                yield decode_json_columns(rows, self._json_columns)
+            self._exhausted = True
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._exit_stack is None:
+            return
+        exit_stack, self._exit_stack = self._exit_stack, None
+        try:
+            if self._exhausted or not self.columns:
+                await self._cursor.close()
+            else:
+                # Closing an unbuffered cursor reads the remaining rows off the wire;
+                # dropping the connection is cheaper when the consumer stopped early.
+                self._connection.close()
+        finally:
+            await exit_stack.aclose()
 
 class DatabaseService:
-    def __init__(self, options: DatabaseOptions):
+    def __init__(
+        self,
+        options: DatabaseOptions,
+        pool: DatabasePool,
+        metrics: Optional[MetricsRegistry] = None,
+        shared_cache: Optional[SharedCacheStore] = None
+    ):
         self.options = options
+        self.pool = pool
+        self.metrics = metrics or MetricsRegistry()
+        self.sql_rewriter = SqlRewriter(options)
+        self.result_cache = QueryResultCache(options, lambda: self.get_table_fingerprints(base_tables_only=True), shared_cache)
+        self.cost_guard = QueryCostGuard(options, self._explain)
+        # Queries and streams share one lane; schema and table lookups have their own
+        self.query_admission = AdmissionController(
+            LANE_QUERY,
+            options.admission_max_concurrency,
+            options.admission_max_per_client,
+            options.admission_queue_size,
+            options.admission_queue_timeout_seconds,
+            self.metrics
+        )
+        self.metadata_admission = AdmissionController(
+            LANE_METADATA,
+            options.admission_metadata_concurrency if options.admission_max_concurrency > 0 else 0,
+            queue_size=options.admission_queue_size,
+            queue_timeout_seconds=options.admission_queue_timeout_seconds,
+            metrics=self.metrics
+        )
+        self._background_tasks: Set[asyncio.Task] = set()
 
-    async def get_database_schema(self) -> List[TableSchema]:
-        tables: Dict[str, TableSchema] = {}
+    async def get_database_schema(self, table_names: Optional[List[str]] = None) -> List[TableSchema]:
+        """
+        Introspects the tables of the current database.
+        When table_names is given, only those tables are introspected.
+        """
+        if table_names is not None and not table_names:
+            return []
+        table_filter, filter_params = self._table_name_filter(table_names)
 
-        connection = await self._get_connection()
-        try:
+        async with self.metadata_admission.admit(), self.pool.acquire() as connection:
             async with connection.cursor(aiomysql.cursors.DictCursor) as cursor: # Changed to aiomysql.cursors.DictCursor
                 # Query for columns
                 await cursor.execute("""
                     SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE
                     FROM INFORMATION_SCHEMA.COLUMNS
                     WHERE TABLE_SCHEMA = DATABASE()
-                """)
-                for row in await cursor.fetchall():
-                    table_name = row['TABLE_NAME']
-                    column = ColumnSchema(
-                        name=row['COLUMN_NAME'],
-                        data_type=row['DATA_TYPE'],
-                        is_nullable=row['IS_NULLABLE'] == "YES"
-                    )
-
-                    if table_name not in tables:
-                        tables[table_name] = TableSchema(name=table_name)
-                    tables[table_name].columns.append(column)
+                """ + table_filter.format(column="TABLE_NAME"), filter_params)
+                column_rows = await cursor.fetchall()
 
                 # Query for keys
                 await cursor.execute("""
@@ -51,84 +149,361 @@ class DatabaseService:
                                    AND tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
                     WHERE tc.TABLE_SCHEMA = DATABASE()
                       AND tc.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'FOREIGN KEY')
+                """ + table_filter.format(column="tc.TABLE_NAME") + """
                     ORDER BY tc.TABLE_NAME, kcu.ORDINAL_POSITION
-                """)
-                for row in await cursor.fetchall():
-                    table_name = row['TABLE_NAME']
-                    constraint_type = row['CONSTRAINT_TYPE']
-                    constraint_name = row['CONSTRAINT_NAME']
-                    column_name = row['COLUMN_NAME']
-                    referenced_table = row['REFERENCED_TABLE_NAME'] if row['REFERENCED_TABLE_NAME'] else ""
-                    referenced_column = row['REFERENCED_COLUMN_NAME'] if row['REFERENCED_COLUMN_NAME'] else ""
-
-                    if table_name not in tables:
-                        tables[table_name] = TableSchema(name=table_name)
-
-                    table = tables[table_name]
-                    column = next((c for c in table.columns if c.name == column_name), None)
-
-                    if constraint_type == "PRIMARY KEY":
-                        if column_name not in table.primary_key_columns:
-                            table.primary_key_columns.append(column_name)
-                        if column:
-                            column.is_primary_key = True
-                    elif constraint_type == "FOREIGN KEY":
-                        if column:
-                            column.is_foreign_key = True
-                        
-                        foreign_key = next((fk for fk in table.foreign_keys if fk.name == constraint_name), None)
-                        if foreign_key is None:
-                            foreign_key = ForeignKeySchema(
-                                name=constraint_name,
-                                referenced_table=referenced_table
-                            )
-                            table.foreign_keys.append(foreign_key)
-                        
-                        foreign_key.columns.append(ForeignKeyColumn(
-                            column=column_name,
-                            referenced_column=referenced_column
-                        ))
-        finally:
-            connection.close() # aiomysql connection objects have .close()
+                """, filter_params)
+                key_rows = await cursor.fetchall()
+
+        return self.assemble_tables(column_rows, key_rows)
+
+    @staticmethod
+    def assemble_tables(
+        column_rows: List[Dict[str, Any]],
+        key_rows: List[Dict[str, Any]]
+    ) -> List[TableSchema]:
+        """
+        Builds TableSchema objects from INFORMATION_SCHEMA.COLUMNS rows and key rows.
+        Columns, primary key columns and foreign keys are indexed by name per table,
+        so assembly is linear in the number of rows regardless of table width.
+        """
+        tables: Dict[str, TableSchema] = {}
+        columns_by_table: Dict[str, Dict[str, ColumnSchema]] = {}
+        primary_keys_by_table: Dict[str, Set[str]] = {}
+        foreign_keys_by_table: Dict[str, Dict[str, ForeignKeySchema]] = {}
+
+        def get_table(table_name: str) -> TableSchema:
+            table = tables.get(table_name)
+            if table is None:
+                table = tables[table_name] = TableSchema(name=table_name)
+                columns_by_table[table_name] = {}
+                primary_keys_by_table[table_name] = set()
+                foreign_keys_by_table[table_name] = {}
+            return table
+
+        for row in column_rows:
+            table_name = row['TABLE_NAME']
+            column = ColumnSchema(
+                name=row['COLUMN_NAME'],
+                data_type=row['DATA_TYPE'],
+                is_nullable=row['IS_NULLABLE'] == "YES"
+            )
+            get_table(table_name).columns.append(column)
+            columns_by_table[table_name][column.name] = column
+
+        for row in key_rows:
+            table_name = row['TABLE_NAME']
+            constraint_type = row['CONSTRAINT_TYPE']
+            constraint_name = row['CONSTRAINT_NAME']
+            column_name = row['COLUMN_NAME']
+            referenced_table = row['REFERENCED_TABLE_NAME'] if row['REFERENCED_TABLE_NAME'] else ""
+            referenced_column = row['REFERENCED_COLUMN_NAME'] if row['REFERENCED_COLUMN_NAME'] else ""
+
+            table = get_table(table_name)
+            column = columns_by_table[table_name].get(column_name)
+
+            if constraint_type == "PRIMARY KEY":
+                primary_keys = primary_keys_by_table[table_name]
+                if column_name not in primary_keys:
+                    primary_keys.add(column_name)
+                    table.primary_key_columns.append(column_name)
+                if column:
+                    column.is_primary_key = True
+            elif constraint_type == "FOREIGN KEY":
+                if column:
+                    column.is_foreign_key = True
+
+                foreign_keys = foreign_keys_by_table[table_name]
+                foreign_key = foreign_keys.get(constraint_name)
+                if foreign_key is None:
+                    foreign_key = foreign_keys[constraint_name] = ForeignKeySchema(
+                        name=constraint_name,
+                        referenced_table=referenced_table
+                    )
+                    table.foreign_keys.append(foreign_key)
+
+                foreign_key.columns.append(ForeignKeyColumn(
+                    column=column_name,
+                    referenced_column=referenced_column
+                ))
 
         return list(tables.values())
 
-    async def execute_query(self, query: str) -> QueryResult:
-        connection = await self._get_connection()
+    async def get_table_fingerprints(self, base_tables_only: bool = False, table_names: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Cheap change-detection probe: returns a fingerprint per table built from
+        INFORMATION_SCHEMA.TABLES timestamps, without touching COLUMNS or KEY_COLUMN_USAGE.
+        Views have no timestamps of their own; base_tables_only leaves them out.
+        When table_names is given, only those tables are probed.
+        """
+        if table_names is not None and not table_names:
+            return {}
+        table_type_filter = " AND TABLE_TYPE = 'BASE TABLE'" if base_tables_only else ""
+        table_filter, filter_params = self._table_name_filter(table_names)
+        async with self.metadata_admission.admit(), self.pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(f"""
+                    SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME
+                    FROM INFORMATION_SCHEMA.TABLES
+                    WHERE TABLE_SCHEMA = DATABASE(){table_type_filter}
+                """ + table_filter.format(column="TABLE_NAME"), filter_params)
+                return {row[0]: f"{row[1]}|{row[2]}" for row in await cursor.fetchall()}
+
+    async def get_lower_case_table_names(self) -> int:
+        """The server's lower_case_table_names: 0 when table names are case-sensitive."""
+        async with self.metadata_admission.admit(), self.pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute("SELECT @@lower_case_table_names")
+                row = await cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else 0
+
+    async def list_tables(self, cursor: Optional[str] = None, limit: int = 100, prefix: Optional[str] = None) -> TablePage:
+        """
+        Lists tables of the current database in name order with their size estimates, one page
+        at a time, from INFORMATION_SCHEMA.TABLES only. Pages are keyed by the last name seen,
+        so each page costs the same however far the listing has progressed.
+        Raises ValueError for a cursor that was not returned by a previous call.
+        """
+        conditions, params = "", []
+        if cursor:
+            conditions += " AND TABLE_NAME > %s"
+            params.append(self._decode_cursor(cursor))
+        if prefix:
+            conditions += " AND TABLE_NAME LIKE %s"
+            params.append(prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        params.append(limit + 1)
+
+        async with self.metadata_admission.admit(), self.pool.acquire() as connection:
+            async with connection.cursor() as db_cursor:
+                await db_cursor.execute(f"""
+                    SELECT TABLE_NAME, TABLE_TYPE, ENGINE, TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH, UPDATE_TIME
+                    FROM INFORMATION_SCHEMA.TABLES
+                    WHERE TABLE_SCHEMA = DATABASE(){conditions}
+                    ORDER BY TABLE_NAME
+                    LIMIT %s
+                """, params)
+                rows = await db_cursor.fetchall()
+
+        tables = [
+            TableSummary(
+                name=row[0], table_type=row[1], engine=row[2], row_estimate=row[3],
+                data_bytes=row[4], index_bytes=row[5], update_time=row[6]
+            )
+            for row in rows[:limit]
+        ]
+        # One row more than the page size was requested to tell whether another page follows
+        next_cursor = self._encode_cursor(tables[-1].name) if len(rows) > limit else None
+        return TablePage(tables=tables, next_cursor=next_cursor)
+
+    @staticmethod
+    def _encode_cursor(table_name: str) -> str:
+        return base64.urlsafe_b64encode(table_name.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> str:
         try:
-            async with connection.cursor(aiomysql.cursors.DictCursor) as cursor: # Changed to aiomysql.cursors.DictCursor
-                # Set command timeout if specified
-                if self.options.command_timeout_seconds > 0:
-                    # PyMySQL/aiomysql does not directly support command timeouts like .NET.
-                    # MAX_EXECUTION_TIME is a MySQL variable, set per session.
-                    await cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {self.options.command_timeout_seconds * 1000}") # MySQL expects milliseconds
+            table_name = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+        except (ValueError, UnicodeError):
+            table_name = ""
+        if not table_name:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return table_name
 
-                # TODO: Implement enforce_read_only and require_limit logic
+    @staticmethod
+    def _table_name_filter(table_names: Optional[List[str]]):
+        if table_names is None:
+            return "", None
+        placeholders = ", ".join(["%s"] * len(table_names))
+        return f" AND {{column}} IN ({placeholders})", list(table_names)
 
-                await cursor.execute(query)
-                
-                columns = [desc[0] for desc in cursor.description] if cursor.description else []
-                rows = await cursor.fetchall()
-                records_affected = cursor.rowcount
+    async def execute_query(
+        self,
+        query: str,
+        result_format: QueryResultFormat = QueryResultFormat.ROWS,
+        params: Optional[QueryParameters] = None
+    ) -> AnyQueryResult:
+        """
+        Executes the query after enforce_read_only/require_limit checks, or answers it
+        from the result cache when enabled. Raises QueryRejectedError when the query is not allowed.
+        When params are given, the query is a template with %s / ? or %(name)s placeholders;
+        values are escaped by the driver and the template is analyzed only once.
+        Raises AdmissionRejectedError when too many queries are running or waiting, and
+        StreamingRequiredError when the cost guard routes the query to open_query_stream.
+        """
+        return await self._execute_query(query, result_format, params, PRIORITY_INTERACTIVE)
+
+    async def _execute_query(
+        self,
+        query: str,
+        result_format: QueryResultFormat,
+        params: Optional[QueryParameters],
+        priority: int,
+        deadline: Optional[float] = None
+    ) -> AnyQueryResult:
+        rewritten = self.sql_rewriter.rewrite(query, parameterized=params is not None)
+        self.sql_rewriter.check_parameters(rewritten, params)
+        limit = await self.cost_guard.check(rewritten, params)
+        if limit is not None:
+            rewritten = self.sql_rewriter.rewrite(query, parameterized=params is not None, max_rows=limit)
+        params = self.sql_rewriter.clamp_limit_parameter(rewritten, params)
+        # Cache hits are answered without waiting for admission
+        result = await self.result_cache.get_or_execute(
+            rewritten, lambda: self._fetch_all(rewritten.sql, params, priority, deadline), params
+        )
+        with self.metrics.stage("format"):
+            return encode_query_result(result.columns, result.rows, result.records_affected, result_format, result.json_columns)
 
-                # aiomysql's DictCursor already returns dicts
-                formatted_rows = [{k: (None if v is None else v) for k, v in row.items()} for row in rows]
+    async def execute_query_batch(
+        self,
+        queries: Sequence[QueryRequest],
+        max_concurrency: int,
+        timeout_seconds: float
+    ) -> QueryBatchResult:
+        """
+        Runs independent statements concurrently, at most max_concurrency at a time, each on
+        its own pooled connection, so the batch takes about as long as its slowest statement.
+        Statements still queued or running after timeout_seconds are cancelled. Failures are
+        reported per statement and never fail the batch as a whole.
+        """
+        started = time.perf_counter()
+        # Batch statements queue behind interactive queries, and give up waiting at the batch deadline
+        deadline = time.monotonic() + timeout_seconds
+        semaphore = asyncio.Semaphore(max_concurrency)
+        items: List[Optional[QueryBatchItem]] = [None] * len(queries)
 
+        async def run(index: int, request: QueryRequest) -> None:
+            async with semaphore:
+                try:
+                    result = await self._execute_query(request.query, request.format, request.params, PRIORITY_BATCH, deadline)
+                    items[index] = QueryBatchItem(result=result, elapsed_ms=(time.perf_counter() - started) * 1000)
+                except Exception as e:
+                    items[index] = QueryBatchItem(error=self._describe_error(e), elapsed_ms=(time.perf_counter() - started) * 1000)
+
+        tasks = [asyncio.create_task(run(index, request)) for index, request in enumerate(queries)]
+        try:
+            await asyncio.wait(tasks, timeout=timeout_seconds)
         finally:
-            connection.close() # aiomysql connection objects have .close()
-
-        return QueryResult(columns=columns, rows=formatted_rows, records_affected=records_affected)
-
-    async def _get_connection(self):
-        # Parse connection string
-        parts = {p.split('=', 1)[0].strip().lower(): p.split('=', 1)[1].strip() for p in self.options.connection_string.split(';') if p}
-        
-        return await aiomysql.connect( # Changed to aiomysql.connect
-            host=parts.get('server') or parts.get('host', 'localhost'),
-            user=parts.get('uid') or parts.get('user', 'root'),
-            password=parts.get('pwd') or parts.get('password', ''),
-            db=parts.get('database') or parts.get('db'), # Changed 'database' to 'db' for aiomysql
-            charset='utf8mb4',
-            cursorclass=aiomysql.cursors.Cursor, # Changed to aiomysql.cursors.Cursor
-            autocommit=True
-        )
\ No newline at end of file
+            # Also reached when the caller is cancelled, e.g. because the client went away
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for index, item in enumerate(items):
+            if item is None:
+                items[index] = QueryBatchItem(
+                    error=f"Cancelled: the batch deadline of {timeout_seconds}s passed before the query completed",
+                    elapsed_ms=elapsed_ms
+                )
+        return QueryBatchResult(results=items, elapsed_ms=elapsed_ms)
+
+    @staticmethod
+    def _describe_error(error: Exception) -> str:
+        if isinstance(error, QueryRejectedError):
+            return f"Query rejected: {str(error)}"
+        if isinstance(error, QueryTimeoutError):
+            return str(error)
+        if isinstance(error, PoolExhaustedError):
+            return f"Database is busy: {str(error)}"
+        if isinstance(error, pymysql.MySQLError):
+            return f"Query failed: {str(error)}"
+        logger.exception(f"Unexpected error in batched query: {error}")
+        return f"Internal error: {str(error)}"
+
+    async def _fetch_all(
+        self,
+        sql: str,
+        params: Optional[QueryParameters] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[float] = None
+    ) -> CachedResult:
+        async with self.query_admission.admit(priority, deadline):
+            started = time.perf_counter()
+            async with self.pool.acquire() as connection:
+                self.metrics.observe_stage("acquire", started)
+                return await self._with_timeout(connection, self._read_all(connection, sql, params))
+
+    async def _read_all(self, connection, sql: str, params: Optional[QueryParameters]) -> CachedResult:
+        # The plain cursor returns tuples; dicts are only built for the rows format
+        async with connection.cursor() as cursor:
+            with self.metrics.stage("execute"):
+                await cursor.execute(sql, params)
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            with self.metrics.stage("fetch"):
+                rows = await cursor.fetchall()
+            return CachedResult(columns, rows, cursor.rowcount, json_column_indexes(cursor.description))
+
+    async def _explain(self, sql: str, params: Optional[QueryParameters]) -> Dict[str, Any]:
+        """The optimizer's plan of a statement, from EXPLAIN FORMAT=JSON; nothing is executed."""
+        async with self.metadata_admission.admit(), self.pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await self._with_timeout(connection, cursor.execute("EXPLAIN FORMAT=JSON " + sql, params))
+                row = await cursor.fetchone()
+        return json.loads(row[0])
+
+    async def _with_timeout(self, connection, operation: Awaitable[T]) -> T:
+        """
+        Runs a statement under command_timeout_seconds. When the client-side deadline
+        passes, the statement is killed on the server so it stops consuming resources,
+        and the connection (left mid-protocol) is closed instead of returned to the pool.
+        """
+        timeout = self.options.command_timeout_seconds
+        try:
+            if timeout <= 0:
+                return await operation
+            return await asyncio.wait_for(operation, timeout + CLIENT_TIMEOUT_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            try:
+                await self.pool.kill_query(connection.thread_id())
+            finally:
+                connection.close()
+            raise QueryTimeoutError(f"Query exceeded the {timeout}s command timeout and was cancelled")
+        except asyncio.CancelledError:
+            # The caller gave up (batch deadline, client disconnect) while the statement may still
+            # be running: drop the connection now and kill the statement in the background
+            connection.close()
+            task = asyncio.create_task(self.pool.kill_query(connection.thread_id()))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            raise
+        except pymysql.err.OperationalError as e:
+            if e.args and e.args[0] == ER_QUERY_TIMEOUT:
+                raise QueryTimeoutError(f"Query exceeded the {timeout}s command timeout and was cancelled") from e
+            raise
+
+    async def open_query_stream(
+        self,
+        query: str,
+        batch_size: Optional[int] = None,
+        params: Optional[QueryParameters] = None
+    ) -> QueryStream:
+        """
+        Executes the query on a server-side cursor and returns a QueryStream over its rows.
+        The caller must exhaust the stream or call aclose() to return the connection to the pool.
+        Streams are checked for enforce_read_only and cost_guard_max_rows_examined but not
+        capped to max_rows or the result size thresholds, since their memory use does not
+        grow with the result size. A stream holds its admission slot
+        until it is closed, and is admitted behind interactive queries.
+        """
+        rewritten = self.sql_rewriter.rewrite(query, apply_limit=False, parameterized=params is not None)
+        self.sql_rewriter.check_parameters(rewritten, params)
+        await self.cost_guard.check(rewritten, params, streaming=True)
+        exit_stack = AsyncExitStack()
+        cursor = None
+        try:
+            await exit_stack.enter_async_context(self.query_admission.admit(PRIORITY_BATCH))
+            started = time.perf_counter()
+            connection = await exit_stack.enter_async_context(self.pool.acquire())
+            self.metrics.observe_stage("acquire", started)
+            cursor = await connection.cursor(aiomysql.cursors.SSDictCursor)
+            with self.metrics.stage("stream_open"):
+                await self._with_timeout(connection, cursor.execute(rewritten.sql, params))
+        except BaseException:
+            if cursor is not None:
+                try:
+                    await cursor.close()
+                except Exception:
+                    # The connection may be broken; it is released below either way
+                    pass
+            await exit_stack.aclose()
+            raise
+        return QueryStream(exit_stack, connection, cursor, batch_size or self.options.stream_batch_size)
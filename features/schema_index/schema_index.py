@@ -0,0 +1,270 @@
+import bisect
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from models.foreign_key_schema import ForeignKeySchema
+from models.schema_search import SchemaJoinPath, SchemaNeighborhood, SchemaRelationship, SchemaSearchHit
+from models.table_schema import TableSchema
+
+# Scores per query word; a word matching the whole name of a table or column gets EXACT_NAME_BONUS on top
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.7
+FUZZY_SCORE = 0.6
+EXACT_NAME_BONUS = 0.5
+# Share of the table's score a matching column inherits for the words matching its table name
+TABLE_CONTEXT_WEIGHT = 0.5
+# Minimum trigram similarity (Jaccard) for a fuzzy match; only words within FUZZY_WINDOW
+# of the most similar one are used, at most FUZZY_MAX_TOKENS of them
+FUZZY_THRESHOLD = 0.3
+FUZZY_WINDOW = 0.1
+FUZZY_MAX_TOKENS = 8
+
+_WORD_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+_QUERY_SEPARATORS = re.compile(r"[\s,;]+")
+
+# A table, or a column of a table
+_Entry = Tuple[str, Optional[str]]
+# (neighbor, foreign key, referencing table)
+_Edge = Tuple[str, ForeignKeySchema, str]
+
+def name_tokens(name: str) -> Set[str]:
+    """
+    The lower-cased name, its words and their singulars:
+    `customerOrders_id` gives customerorders_id, customer, orders, order and id.
+    """
+    tokens = {name.lower()}
+    for word in _WORD_PATTERN.findall(name):
+        word = word.lower()
+        tokens.add(word)
+        if len(word) > 4 and word.endswith("ies"):
+            tokens.add(word[:-3] + "y")
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            tokens.add(word[:-1])
+    return tokens
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SchemaIndex:
+    """
+    Search and relationship index over one schema snapshot.
+
+    Table and column names are split into words and kept in an inverted index with a sorted
+    vocabulary for prefix lookups and a trigram index for misspellings. Foreign keys form an
+    undirected graph, so related tables and join paths are found by breadth-first search.
+    The index is immutable; a new one is built for every snapshot.
+    """
+    def __init__(self, tables: Iterable[TableSchema]):
+        self._tables: Dict[str, TableSchema] = {table.name: table for table in tables}
+        self._names_by_lower: Dict[str, str] = {name.lower(): name for name in self._tables}
+        self._postings: Dict[str, List[_Entry]] = {}
+        self._full_names: Dict[_Entry, str] = {}
+        self._edges: Dict[str, List[_Edge]] = {name: [] for name in self._tables}
+        # Column names repeat across tables (id, created_at, ...), so each is tokenized once
+        self._tokens_by_name: Dict[str, Set[str]] = {}
+
+        for table in self._tables.values():
+            self._add((table.name, None), table.name)
+            for column in table.columns:
+                self._add((table.name, column.name), column.name)
+            for foreign_key in table.foreign_keys:
+                referenced = self._names_by_lower.get(foreign_key.referenced_table.lower())
+                if referenced is None:
+                    continue
+                self._edges[table.name].append((referenced, foreign_key, table.name))
+                if referenced != table.name:
+                    self._edges[referenced].append((table.name, foreign_key, table.name))
+
+        del self._tokens_by_name
+        self._vocabulary = sorted(self._postings)
+        self._tokens_by_trigram: Dict[str, List[str]] = {}
+        for token in self._vocabulary:
+            for trigram in _trigrams(token):
+                self._tokens_by_trigram.setdefault(trigram, []).append(token)
+
+    def _add(self, entry: _Entry, name: str) -> None:
+        self._full_names[entry] = name.lower()
+        tokens = self._tokens_by_name.get(name)
+        if tokens is None:
+            tokens = self._tokens_by_name[name] = name_tokens(name)
+        for token in tokens:
+            self._postings.setdefault(token, []).append(entry)
+
+    def resolve(self, table: str) -> Optional[str]:
+        """The table's name as stored, looked up case-insensitively."""
+        return table if table in self._tables else self._names_by_lower.get(table.lower())
+
+    # --- Search ---
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 20) -> List[SchemaSearchHit]:
+        words = [word.lower() for word in _QUERY_SEPARATORS.split(query) if word]
+        # Per entry, the best score of each query word
+        scores: Dict[_Entry, List[float]] = {}
+        for position, word in enumerate(words):
+            for token, score in self._matching_tokens(word).items():
+                for entry in self._postings[token]:
+                    word_scores = scores.get(entry)
+                    if word_scores is None:
+                        word_scores = scores[entry] = [0.0] * len(words)
+                    if score > word_scores[position]:
+                        word_scores[position] = score
+
+        hits = []
+        for entry, word_scores in scores.items():
+            table, column = entry
+            if (kind == "table" and column is not None) or (kind == "column" and column is None):
+                continue
+            score = sum(word_scores)
+            if column is not None:
+                # "orders customer" ranks orders.customer_id above other customer columns
+                table_scores = scores.get((table, None))
+                if table_scores is not None:
+                    score += TABLE_CONTEXT_WEIGHT * sum(
+                        table_score for word_score, table_score in zip(word_scores, table_scores) if word_score == 0.0
+                    )
+            if self._full_names[entry] in words:
+                score += EXACT_NAME_BONUS
+            hits.append((score, entry))
+
+        # Ties go to tables before columns, then to shorter names (closer to the words typed)
+        hits.sort(key=lambda hit: (-hit[0], hit[1][1] is not None, len(self._full_names[hit[1]]), hit[1][0], hit[1][1] or ""))
+        results = []
+        for score, (table, column) in hits[:limit]:
+            data_type = None
+            if column is not None:
+                data_type = next((c.data_type for c in self._tables[table].columns if c.name == column), None)
+            results.append(SchemaSearchHit(table=table, column=column, data_type=data_type, score=round(score, 3)))
+        return results
+
+    def _matching_tokens(self, word: str) -> Dict[str, float]:
+        matches: Dict[str, float] = {}
+        vocabulary = self._vocabulary
+        for position in range(bisect.bisect_left(vocabulary, word), len(vocabulary)):
+            token = vocabulary[position]
+            if not token.startswith(word):
+                break
+            # Shorter completions are closer to what was typed
+            matches[token] = EXACT_SCORE if token == word else PREFIX_SCORE + 0.2 * len(word) / len(token)
+        # Misspellings are only looked for when the word matches nothing as typed
+        if matches or len(word) < 3:
+            return matches
+
+        trigrams = _trigrams(word)
+        shared: Dict[str, int] = {}
+        for trigram in trigrams:
+            for token in self._tokens_by_trigram.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        similar = []
+        for token, count in shared.items():
+            similarity = count / (len(trigrams) + len(token) + 1 - count)
+            if similarity >= FUZZY_THRESHOLD:
+                similar.append((similarity, token))
+        similar.sort(reverse=True)
+        return {
+            token: FUZZY_SCORE * similarity
+            for similarity, token in similar[:FUZZY_MAX_TOKENS]
+            if similarity >= similar[0][0] - FUZZY_WINDOW
+        }
+
+    # --- Relationships ---
+
+    def neighborhood(self, table: str, hops: int = 1, limit: int = 100, include_columns: bool = True) -> Optional[SchemaNeighborhood]:
+        """Tables reachable within hops foreign keys (either direction), nearest first; None for an unknown table."""
+        start = self.resolve(table)
+        if start is None:
+            return None
+        distances = {start: 0}
+        queue = deque([start])
+        truncated = False
+        while queue:
+            current = queue.popleft()
+            if distances[current] >= hops:
+                continue
+            for neighbor, _, _ in self._edges[current]:
+                if neighbor in distances:
+                    continue
+                if len(distances) >= limit:
+                    truncated = True
+                    break
+                distances[neighbor] = distances[current] + 1
+                queue.append(neighbor)
+            if truncated:
+                break
+
+        relationships = [
+            self._relationship(foreign_key, referencing)
+            for name in distances
+            for neighbor, foreign_key, referencing in self._edges[name]
+            if referencing == name and neighbor in distances
+        ]
+        return SchemaNeighborhood(
+            table=start,
+            distances=distances,
+            tables=[self._tables[name] for name in distances] if include_columns else [],
+            relationships=relationships,
+            truncated=truncated
+        )
+
+    def join_path(self, from_table: str, to_table: str, max_hops: int = 6) -> Optional[SchemaJoinPath]:
+        """
+        The shortest chain of foreign keys connecting the two tables, or None when there is
+        none within max_hops. Raises KeyError for unknown tables.
+        """
+        start, goal = self.resolve(from_table), self.resolve(to_table)
+        if start is None:
+            raise KeyError(from_table)
+        if goal is None:
+            raise KeyError(to_table)
+
+        previous: Dict[str, Optional[Tuple[str, _Edge]]] = {start: None}
+        depth = {start: 0}
+        queue = deque([start])
+        while queue and goal not in previous:
+            current = queue.popleft()
+            if depth[current] >= max_hops:
+                continue
+            for edge in self._edges[current]:
+                neighbor = edge[0]
+                if neighbor not in previous:
+                    previous[neighbor] = (current, edge)
+                    depth[neighbor] = depth[current] + 1
+                    queue.append(neighbor)
+        if goal not in previous:
+            return None
+
+        tables = [goal]
+        edges: List[_Edge] = []
+        while previous[tables[-1]] is not None:
+            parent, edge = previous[tables[-1]]
+            edges.append(edge)
+            tables.append(parent)
+        tables.reverse()
+        edges.reverse()
+
+        sql = f"FROM {_quote(tables[0])}"
+        for left, right, (_, foreign_key, referencing) in zip(tables, tables[1:], edges):
+            referenced = right if referencing == left else left
+            conditions = " AND ".join(
+                f"{_quote(referencing)}.{_quote(column.column)} = {_quote(referenced)}.{_quote(column.referenced_column)}"
+                for column in foreign_key.columns
+            )
+            sql += f" JOIN {_quote(right)} ON {conditions}"
+        return SchemaJoinPath(
+            tables=tables,
+            steps=[self._relationship(foreign_key, referencing) for _, foreign_key, referencing in edges],
+            sql=sql
+        )
+
+    def _relationship(self, foreign_key: ForeignKeySchema, referencing: str) -> SchemaRelationship:
+        return SchemaRelationship(
+            constraint=foreign_key.name,
+            table=referencing,
+            columns=[column.column for column in foreign_key.columns],
+            referenced_table=self.resolve(foreign_key.referenced_table) or foreign_key.referenced_table,
+            referenced_columns=[column.referenced_column for column in foreign_key.columns]
+        )
+
+def _quote(identifier: str) -> str:
+    return "`" + identifier.replace("`", "``") + "`"
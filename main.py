@@ -1,22 +1,53 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from typing import List, Optional
+from contextlib import asynccontextmanager
+import argparse
+import asyncio
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Any, Dict, List, Optional, Union
 import uvicorn
 import logging
 import os
+import pymysql
+import shutil
+import tempfile
 
-from config import DatabaseOptions
-from database_service import DatabaseService
+from admission_control import ClientIdentityMiddleware
+from config import DatabaseOptions, RpcOptions
+from database_pool import DatabasePool, PoolExhaustedError
+from database_service import DatabaseService, QueryStream, QueryTimeoutError
+from metrics import MetricsRegistry, Trace
+from models.query_request import QueryRequest
+from query_cost_guard import StreamingRequiredError
+from models.query_result import QueryResultFormat
+from query_result_encoding import arrow_available
 from models.table_schema import TableSchema
+from models.table_summary import TablePage
+from schema_cache import SchemaCache
+from shared_cache_store import SharedCacheStore
+from serialization import FastJSONResponse, dumps_line
+from sql_rewriter import QueryRejectedError
 # Load database connection string from environment variables
 db_connection_string = os.getenv('DB_CONNECTION_STRING')
 
 from rpc.json_rpc_interfaces import JsonRpcRequest, JsonRpcResponse, IJsonRpcHandler, IJsonRpcPipelineBehavior
 from rpc.json_rpc_router import JsonRpcRouter
+from rpc.json_rpc_streaming import is_streaming_response, iterate_streaming_response
+from rpc.transports.stdio_transport import run_stdio_session
+from rpc.transports.websocket_transport import serve_websocket_session
 from rpc.handlers.ping_handler import PingHandler
 from rpc.handlers.initialize_handler import InitializeHandler
 from rpc.handlers.prompts_list_handler import PromptsListHandler
+from rpc.handlers.query_execute_handler import QueryExecuteHandler
+from rpc.handlers.query_stream_handler import QueryStreamHandler
+from rpc.handlers.query_batch_handler import QueryBatchHandler
+from rpc.handlers.schema_search_handler import SchemaSearchHandler
+from rpc.handlers.schema_neighborhood_handler import SchemaNeighborhoodHandler
+from rpc.handlers.schema_join_path_handler import SchemaJoinPathHandler
+from rpc.handlers.schema_tables_handler import SchemaTablesHandler
+from rpc.handlers.schema_table_handler import SchemaTableHandler
 from rpc.behaviors.exception_behavior import JsonRpcExceptionBehavior
 from rpc.behaviors.logging_behavior import JsonRpcLoggingBehavior
+from rpc.behaviors.metrics_behavior import JsonRpcMetricsBehavior
 from rpc.behaviors.validation_behavior import JsonRpcValidationBehavior
 
 from features.prompts.prompt_registry import PromptRegistry
@@ -25,8 +56,6 @@ from features.prompts.prompt_registry import PromptRegistry
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="MCP.Server.MySql_Python", version="0.1.0")
-
 # --- Configuration ---
 # In a real application, this would be loaded from environment variables or a configuration file
 # For now, using a placeholder connection string.
@@ -34,51 +63,136 @@ app = FastAPI(title="MCP.Server.MySql_Python", version="0.1.0")
 db_connection_string = os.getenv('DB_CONNECTION_STRING')
 db_options = DatabaseOptions(
     connection_string=db_connection_string,
-    command_timeout_seconds=60 # Example override
+    command_timeout_seconds=60, # Example override
+    # Set for every worker process when started with --workers
+    shared_cache_dir=os.getenv('MCP_SHARED_CACHE_DIR')
 )
+rpc_options = RpcOptions()
 
-# --- Dependencies ---
-def get_database_service() -> DatabaseService:
-    return DatabaseService(db_options)
-
-def get_prompt_registry() -> PromptRegistry:
-    return PromptRegistry()
+# --- Application lifecycle ---
+metrics_registry = MetricsRegistry()
+shared_cache_store = SharedCacheStore(db_options.shared_cache_dir, db_options.shared_cache_max_bytes) if db_options.shared_cache_dir else None
+db_pool = DatabasePool(db_options)
+db_service = DatabaseService(db_options, db_pool, metrics_registry, shared_cache_store)
+schema_cache = SchemaCache(db_service, db_options, shared_cache_store)
+prompt_registry = PromptRegistry()
 
-def get_json_rpc_router(
-    prompt_registry: PromptRegistry = Depends(get_prompt_registry)
-) -> JsonRpcRouter:
-    # Register handlers
-    handlers: List[IJsonRpcHandler] = [
+# --- JSON-RPC pipeline ---
+# Handlers, behaviors and the composed pipeline are built once per process.
+def create_json_rpc_handlers() -> List[IJsonRpcHandler]:
+    return [
         PingHandler(),
         InitializeHandler(),
-        PromptsListHandler(prompt_registry)
+        PromptsListHandler(prompt_registry),
+        QueryExecuteHandler(db_service),
+        QueryStreamHandler(db_service),
+        QueryBatchHandler(
+            db_service,
+            max_statements=rpc_options.query_batch_max_statements,
+            max_concurrency=rpc_options.query_batch_max_concurrency,
+            timeout_seconds=rpc_options.query_batch_timeout_seconds
+        ),
+        SchemaSearchHandler(schema_cache),
+        SchemaNeighborhoodHandler(schema_cache),
+        SchemaJoinPathHandler(schema_cache),
+        SchemaTablesHandler(db_service),
+        SchemaTableHandler(schema_cache)
         # Other handlers will be added here
     ]
 
-    # Register pipeline behaviors
-    behaviors: List[IJsonRpcPipelineBehavior] = [
+def create_json_rpc_behaviors() -> List[IJsonRpcPipelineBehavior]:
+    return [
+        # Outermost, so the measured latency covers the whole pipeline
+        JsonRpcMetricsBehavior(metrics_registry, rpc_options.slow_request_threshold_ms),
         JsonRpcExceptionBehavior(),
         JsonRpcLoggingBehavior(),
         JsonRpcValidationBehavior()
     ]
-    return JsonRpcRouter(handlers=handlers, behaviors=behaviors)
+
+json_rpc_router = JsonRpcRouter(
+    handlers=create_json_rpc_handlers(),
+    behaviors=create_json_rpc_behaviors(),
+    batch_max_concurrency=rpc_options.batch_max_concurrency,
+    batch_max_size=rpc_options.batch_max_size
+)
+
+def reload_json_rpc_router() -> None:
+    """Rebuilds the handlers and pipeline in place, e.g. after handler modules were reloaded."""
+    json_rpc_router.rebuild(create_json_rpc_handlers(), create_json_rpc_behaviors())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await db_pool.open()
+    try:
+        yield
+    finally:
+        await db_pool.close()
+
+app = FastAPI(title="MCP.Server.MySql_Python", version="0.1.0", lifespan=lifespan)
+# Identifies the client of each request, for the per-client admission limits
+app.add_middleware(ClientIdentityMiddleware)
+
+# --- Dependencies ---
+def get_database_service() -> DatabaseService:
+    return db_service
+
+def get_schema_cache() -> SchemaCache:
+    return schema_cache
+
+def get_prompt_registry() -> PromptRegistry:
+    return prompt_registry
+
+def get_json_rpc_router() -> JsonRpcRouter:
+    return json_rpc_router
 
 # --- HTTP Endpoints ---
 @app.get("/api/mysql/health", summary="Simple health check endpoint.")
 async def health():
     return "OK"
 
+def collect_stats() -> Dict[str, Any]:
+    return {
+        "pool": db_pool.metrics(),
+        "schema_cache": schema_cache.metrics(),
+        "sql_rewrite_cache": db_service.sql_rewriter.metrics(),
+        "query_cache": db_service.result_cache.metrics(),
+        "admission_query": db_service.query_admission.metrics(),
+        "admission_metadata": db_service.metadata_admission.metrics(),
+        "cost_guard": db_service.cost_guard.metrics()
+    }
+
+@app.get("/api/mysql/stats", summary="Exposes runtime counters for scraping.")
+async def stats() -> Dict[str, Any]:
+    return collect_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, summary="Exposes request latency histograms, database stage timings and runtime counters in the Prometheus text format.")
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics_registry.render_prometheus(collect_stats()),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/api/mysql/traces", response_model=List[Trace], summary="Lists the most recent requests slower than slow_request_threshold_ms, broken down by stage.")
+async def slow_traces() -> List[Trace]:
+    return list(reversed(metrics_registry.slow_traces))
+
 @app.get(
     "/api/mysql/schema",
     response_model=List[TableSchema],
     summary="Retrieves the database schema and exposes it as JSON."
 )
 async def get_schema(
-    db_service: DatabaseService = Depends(get_database_service)
-) -> List[TableSchema]:
+    request: Request,
+    schema_cache: SchemaCache = Depends(get_schema_cache)
+) -> Response:
     try:
-        schema = await db_service.get_database_schema()
-        return schema
+        snapshot = await schema_cache.get_snapshot()
+    except PoolExhaustedError as e:
+        logger.warning(f"Database pool exhausted while retrieving schema: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Database is busy: {str(e)}"
+        )
     except Exception as e:
         logger.exception("Failed to retrieve database schema.")
         raise HTTPException(
@@ -86,17 +200,199 @@ async def get_schema(
             detail=f"Failed to retrieve database schema: {str(e)}"
         )
 
+    etag = f'"{snapshot.etag}"'
+    if _etag_matches(request.headers.getlist("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    # The body was serialized when the snapshot was built
+    return Response(content=snapshot.body, media_type="application/json", headers={"ETag": etag})
+
+@app.get(
+    "/api/mysql/tables",
+    response_model=TablePage,
+    summary="Lists tables with row and size estimates, one page at a time; pass next_cursor as cursor for the next page."
+)
+async def list_tables(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, gt=0, le=1000),
+    prefix: Optional[str] = None,
+    db_service: DatabaseService = Depends(get_database_service)
+) -> TablePage:
+    try:
+        return await db_service.list_tables(cursor, limit, prefix)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except PoolExhaustedError as e:
+        logger.warning(f"Database pool exhausted while listing tables: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Database is busy: {str(e)}")
+
+@app.get(
+    "/api/mysql/tables/{table_name}",
+    response_model=TableSchema,
+    summary="Retrieves the schema of a single table without loading the whole database schema."
+)
+async def get_table(
+    table_name: str,
+    schema_cache: SchemaCache = Depends(get_schema_cache)
+) -> TableSchema:
+    try:
+        table = await schema_cache.get_table(table_name)
+    except PoolExhaustedError as e:
+        logger.warning(f"Database pool exhausted while retrieving table schema: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Database is busy: {str(e)}")
+    if table is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Table '{table_name}' does not exist")
+    return table
+
+@app.post(
+    "/api/mysql/query",
+    response_model=None,
+    summary="Executes a query and returns the result in the requested format."
+)
+async def execute_query(
+    query_request: QueryRequest,
+    db_service: DatabaseService = Depends(get_database_service)
+) -> Response:
+    if query_request.format == QueryResultFormat.ARROW and not arrow_available():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The arrow format requires pyarrow on the server")
+    try:
+        try:
+            return FastJSONResponse(await db_service.execute_query(query_request.query, query_request.format, query_request.params))
+        except StreamingRequiredError as e:
+            # Streams carry rows only
+            if query_request.format != QueryResultFormat.ROWS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Query rejected: {str(e)}; the result is too large for the {query_request.format.value} format, use /api/mysql/query/stream"
+                )
+            # Too large to build in memory: answered like /api/mysql/query/stream
+            stream = await db_service.open_query_stream(query_request.query, query_request.batch_size, query_request.params)
+            return StreamingResponse(_ndjson_rows(stream), media_type="application/x-ndjson")
+    except QueryRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Query rejected: {str(e)}")
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+    except PoolExhaustedError as e:
+        logger.warning(f"Database pool exhausted while executing query: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Database is busy: {str(e)}")
+    except pymysql.MySQLError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Query failed: {str(e)}")
+
+@app.post(
+    "/api/mysql/query/stream",
+    summary="Executes a query and streams its rows as NDJSON: a header line with the columns, one line per row and a trailer with the row count."
+)
+async def stream_query(
+    query_request: QueryRequest,
+    db_service: DatabaseService = Depends(get_database_service)
+) -> StreamingResponse:
+    try:
+        stream = await db_service.open_query_stream(query_request.query, query_request.batch_size, query_request.params)
+    except QueryRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Query rejected: {str(e)}")
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+    except PoolExhaustedError as e:
+        logger.warning(f"Database pool exhausted while executing query: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Database is busy: {str(e)}")
+    except pymysql.MySQLError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Query failed: {str(e)}")
+
+    return StreamingResponse(_ndjson_rows(stream), media_type="application/x-ndjson")
+
+def _etag_matches(if_none_match: List[str], etag: str) -> bool:
+    """
+    If-None-Match uses the weak comparison: W/ prefixes are ignored, since proxies that
+    compress the body weaken the ETag the client then sends back.
+    """
+    for header in if_none_match:
+        for tag in header.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == etag:
+                return True
+    return False
+
+async def _ndjson_rows(stream: QueryStream):
+    try:
+        yield dumps_line({"columns": stream.columns})
+        async for rows in stream.batches():
+            yield b"".join(dumps_line(row) for row in rows)
+        yield dumps_line({"row_count": stream.row_count, "records_affected": stream.records_affected})
+    except Exception as e:
+        logger.exception("Query stream failed.")
+        yield dumps_line({"error": str(e)})
+    finally:
+        await stream.aclose()
+
 @app.post(
     "/mcp",
-    response_model=Optional[JsonRpcResponse],
-    summary="Entry point for all JSON-RPC requests from the client."
+    response_model=Optional[Union[JsonRpcResponse, List[JsonRpcResponse]]],
+    summary="Entry point for all JSON-RPC requests from the client. Accepts a single request or a batch array."
 )
 async def handle_rpc_request(
-    request: JsonRpcRequest,
+    request: Union[List[Any], JsonRpcRequest],
     router: JsonRpcRouter = Depends(get_json_rpc_router)
-) -> Optional[JsonRpcResponse]:
-    return await router.handle_async(request)
+) -> Response:
+    if isinstance(request, list):
+        # An empty or oversized batch is answered with a single error object, not an array
+        batch_error = router.check_batch(request)
+        if batch_error is not None:
+            return FastJSONResponse(batch_error)
+        responses = await router.handle_batch_async(request)
+        # A batch made only of notifications gets no response body at all
+        return FastJSONResponse(responses) if responses else Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    response = await router.handle_async(request)
+    if is_streaming_response(response):
+        return StreamingResponse(_ndjson_messages(response), media_type="application/x-ndjson")
+    # Returned as a Response so FastAPI skips response_model validation of the (possibly large) result
+    return FastJSONResponse(response)
+
+async def _ndjson_messages(response: JsonRpcResponse):
+    async for message in iterate_streaming_response(response):
+        yield dumps_line(message)
+
+@app.websocket("/mcp/ws")
+async def handle_rpc_websocket(websocket: WebSocket):
+    """Persistent JSON-RPC session: requests are pipelined and answered as they complete."""
+    await serve_websocket_session(websocket, json_rpc_router, rpc_options.session_max_in_flight)
+
+async def run_stdio() -> None:
+    await db_pool.open()
+    try:
+        await run_stdio_session(json_rpc_router, rpc_options.session_max_in_flight)
+    finally:
+        await db_pool.close()
+
+def run_workers(workers: int, host: str, port: int, graceful_timeout: float) -> None:
+    """
+    Serves HTTP from several worker processes. Unless MCP_SHARED_CACHE_DIR is set, the workers
+    share their schema and result caches through a store created for this run and removed at exit.
+    """
+    shared_cache_dir = os.environ.get('MCP_SHARED_CACHE_DIR')
+    created_dir = None
+    if not shared_cache_dir:
+        created_dir = shared_cache_dir = tempfile.mkdtemp(prefix="mcp-mysql-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+        os.environ['MCP_SHARED_CACHE_DIR'] = shared_cache_dir
+    logger.info(f"Starting {workers} workers sharing caches in {shared_cache_dir}")
+    try:
+        # Workers import the application by name; SIGHUP restarts them one at a time
+        uvicorn.run("main:app", host=host, port=port, workers=workers, timeout_graceful_shutdown=graceful_timeout)
+    finally:
+        if created_dir:
+            shutil.rmtree(created_dir, ignore_errors=True)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    parser = argparse.ArgumentParser(description="MCP server for MySQL.")
+    parser.add_argument("--stdio", action="store_true", help="Serve JSON-RPC over stdin/stdout instead of HTTP.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Number of HTTP worker processes; more than one shares the caches between them.")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0, help="Seconds a stopping or reloading worker may spend finishing in-flight requests.")
+    args = parser.parse_args()
+    if args.stdio:
+        asyncio.run(run_stdio())
+    elif args.workers > 1:
+        run_workers(args.workers, args.host, args.port, args.graceful_timeout)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, timeout_graceful_shutdown=args.graceful_timeout)
 # Rest of your code...
@@ -0,0 +1,205 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond cache hits up to the default command timeout
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def counter_field(description: str) -> Any:
+    """A field of a stats model that only increases; /metrics exports it as a counter named ..._total."""
+    return Field(0, description=description, json_schema_extra={"counter": True})
+
+class Counter:
+    """A monotonically increasing value per label set."""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in sorted(self._values.items())]
+
+class Gauge(Counter):
+    """A value per label set that can go up and down."""
+    type_name = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set, as Prometheus expects them."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+class Span(BaseModel):
+    name: str
+    start_ms: float
+    duration_ms: float
+
+class Trace(BaseModel):
+    """Stage-by-stage breakdown of one request."""
+    name: str
+    started_at: float
+    duration_ms: float = 0.0
+    spans: List[Span] = []
+    _origin: float = PrivateAttr(default_factory=time.perf_counter)
+
+    def add_span(self, name: str, started: float, duration: float) -> None:
+        self.spans.append(Span(name=name, start_ms=(started - self._origin) * 1000, duration_ms=duration * 1000))
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._origin) * 1000
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{span.name}={span.duration_ms:.1f}ms" for span in self.spans)
+        return f"{self.name} took {self.duration_ms:.1f}ms ({stages or 'no stages recorded'})"
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+class MetricsRegistry:
+    """
+    Process-wide request and database metrics, rendered in the Prometheus text format.
+    Updates happen on the event loop thread, so they are plain attribute updates.
+    """
+    def __init__(self, slow_trace_history: int = 20):
+        self.rpc_requests = Counter("mcp_rpc_requests_total", "JSON-RPC requests handled, by method and outcome.", ("method", "outcome"))
+        self.rpc_duration = Histogram("mcp_rpc_request_duration_seconds", "JSON-RPC request latency, by method.", ("method",))
+        self.rpc_in_flight = Gauge("mcp_rpc_requests_in_flight", "JSON-RPC requests currently being handled.")
+        self.db_stage_duration = Histogram(
+            "mcp_db_stage_duration_seconds",
+            "Time spent per database stage: acquire, execute, fetch, format, stream_open.",
+            ("stage",)
+        )
+        self.admission_wait = Histogram(
+            "mcp_admission_wait_seconds",
+            "Time database operations waited for an admission slot, by lane (query, metadata).",
+            ("lane",)
+        )
+        self.slow_traces: Deque[Trace] = deque(maxlen=slow_trace_history)
+        self._slow_traces_lock = threading.Lock()
+
+    @property
+    def families(self) -> List[Any]:
+        return [self.rpc_requests, self.rpc_duration, self.rpc_in_flight, self.db_stage_duration, self.admission_wait]
+
+    def observe_stage(self, stage: str, started: float) -> None:
+        """Records a stage that began at started (time.perf_counter()) and ends now."""
+        duration = time.perf_counter() - started
+        self.db_stage_duration.observe(duration, stage)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add_span(stage, started, duration)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, started)
+
+    def record_slow_trace(self, trace: Trace) -> None:
+        with self._slow_traces_lock:
+            self.slow_traces.append(trace)
+
+    def render_prometheus(self, sections: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Renders the registry plus the numeric fields of the given stats sections (e.g. pool
+        and cache metrics) named mcp_<section>_<field>: fields declared with counter_field as
+        counters with a _total suffix, the others as gauges.
+        """
+        lines: List[str] = []
+        for family in self.families:
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.type_name}")
+            lines.extend(family.render())
+
+        for section, values in (sections or {}).items():
+            fields = type(values).model_fields if isinstance(values, BaseModel) else {}
+            if isinstance(values, BaseModel):
+                values = values.model_dump()
+            for field, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                info = fields.get(field)
+                name = f"mcp_{section}_{field}"
+                type_name = "gauge"
+                if info is not None and (info.json_schema_extra or {}).get("counter"):
+                    name, type_name = f"{name}_total", "counter"
+                if info is not None and info.description:
+                    lines.append(f"# HELP {name} {_escape_help(info.description)}")
+                lines.append(f"# TYPE {name} {type_name}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+from metrics import counter_field
+
+class AdmissionMetrics(BaseModel):
+    running: int = Field(0, description="Number of operations currently holding a slot.")
+    queued: int = Field(0, description="Number of operations currently waiting for a slot (queue depth).")
+    clients: int = Field(0, description="Number of clients with operations currently running.")
+    admitted: int = counter_field("Total number of operations admitted.")
+    waited: int = counter_field("Total number of operations that had to queue.")
+    rejected_queue_full: int = counter_field("Total number of operations rejected because the queue was full.")
+    rejected_deadline: int = counter_field("Total number of operations rejected up front because their estimated wait exceeded their deadline.")
+    timed_out: int = counter_field("Total number of operations rejected after waiting until their deadline.")
+    average_wait_ms: float = Field(0.0, description="Average time queued operations waited for a slot.")
+    max_wait_ms: float = Field(0.0, description="Longest time an operation waited for a slot.")
+    average_hold_ms: float = Field(0.0, description="Moving average of the time operations hold a slot; used to estimate waits.")
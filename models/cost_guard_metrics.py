@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+from metrics import counter_field
+
+class CostGuardMetrics(BaseModel):
+    explains: int = counter_field("Total number of EXPLAIN statements run to estimate a query shape.")
+    explain_failures: int = counter_field("Total number of EXPLAIN statements that failed; those queries run unchecked.")
+    cache_hits: int = counter_field("Total number of checks answered from a cached estimate.")
+    entries: int = Field(0, description="Number of query shapes with a cached estimate.")
+    passed: int = counter_field("Total number of queries within all thresholds.")
+    rejected: int = counter_field("Total number of queries rejected by the guard.")
+    limited: int = counter_field("Total number of queries run with a tighter LIMIT.")
+    streamed: int = counter_field("Total number of queries answered as a stream instead.")
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+from metrics import counter_field
+
+class PoolMetrics(BaseModel):
+    size: int = Field(0, description="Number of connections currently open (free and in use).")
+    free: int = Field(0, description="Number of idle connections in the pool.")
+    in_use: int = Field(0, description="Number of connections currently handed out.")
+    waiting: int = Field(0, description="Number of callers currently waiting for a connection.")
+    acquired: int = counter_field("Total number of successful connection acquisitions.")
+    created: int = counter_field("Total number of connections opened by the pool.")
+    recycled: int = counter_field("Total number of idle connections closed and replaced.")
+    ping_failures: int = counter_field("Total number of connections discarded after a failed pre-ping.")
+    timeouts: int = counter_field("Total number of acquisitions that timed out.")
+    rejected: int = counter_field("Total number of acquisitions rejected because too many callers were waiting.")
+    killed_queries: int = counter_field("Total number of statements cancelled with KILL QUERY after exceeding the command timeout.")
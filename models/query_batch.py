@@ -0,0 +1,17 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field
+from .query_request import QueryRequest
+
+class QueryBatchRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., min_length=1, description="Independent statements to run concurrently; each may carry its own params and format.")
+    max_concurrency: Optional[int] = Field(None, gt=0, description="Maximum number of statements running at once; capped by the server's limit.")
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Deadline for the whole batch; statements still running are cancelled. Capped by the server's limit.")
+
+class QueryBatchItem(BaseModel):
+    result: Optional[Any] = Field(None, description="The statement's result in its requested format, when it succeeded.")
+    error: Optional[str] = Field(None, description="Why the statement failed, was rejected or was cancelled.")
+    elapsed_ms: float = Field(0.0, description="Time from the batch start until the statement finished.")
+
+class QueryBatchResult(BaseModel):
+    results: List[QueryBatchItem] = Field(default_factory=list, description="One entry per statement, in request order.")
+    elapsed_ms: float = Field(0.0, description="Wall-clock duration of the whole batch.")
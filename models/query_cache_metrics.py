@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+from metrics import counter_field
+
+class QueryCacheMetrics(BaseModel):
+    hits: int = counter_field("Queries answered from the result cache.")
+    shared_hits: int = counter_field("Hits answered from a result another worker process published to the shared cache (included in hits).")
+    misses: int = counter_field("Cacheable queries that had to be executed.")
+    uncacheable: int = counter_field("Queries skipped because their tables cannot be validated or they are not deterministic.")
+    hit_ratio: float = Field(0.0, description="hits / (hits + misses).")
+    entries: int = Field(0, description="Number of cached results.")
+    bytes: int = Field(0, description="Estimated memory held by cached results.")
+    evictions: int = counter_field("Entries evicted to stay within query_cache_max_bytes.")
+    expirations: int = counter_field("Entries dropped because they outlived query_cache_ttl_seconds.")
+    invalidations: int = counter_field("Entries dropped because a table they read from changed.")
+    probes: int = counter_field("Change-detection probes run against INFORMATION_SCHEMA.TABLES.")
@@ -0,0 +1,9 @@
+from typing import Any, Dict, List, Optional, Union
+from pydantic import BaseModel, Field
+from .query_result import QueryResultFormat
+
+class QueryRequest(BaseModel):
+    query: str = Field(..., description="The SQL statement to execute.")
+    params: Optional[Union[List[Any], Dict[str, Any]]] = Field(None, description="Values for the query's placeholders: a list for %s or ? placeholders, an object for %(name)s placeholders.")
+    format: QueryResultFormat = Field(QueryResultFormat.ROWS, description="Result representation: rows (list of objects), tabular (header + arrays), columnar (one array per column) or arrow (base64 Arrow IPC stream).")
+    batch_size: Optional[int] = Field(None, gt=0, description="Number of rows fetched per round trip when streaming.")
@@ -1,7 +1,31 @@
-from typing import List, Dict, Any, Optional
+from enum import Enum
+from typing import List, Dict, Any, Optional, Sequence
 from pydantic import BaseModel, Field
 
+class QueryResultFormat(str, Enum):
+    ROWS = "rows"
+    TABULAR = "tabular"
+    COLUMNAR = "columnar"
+    ARROW = "arrow"
+
 class QueryResult(BaseModel):
     columns: List[str] = Field(default_factory=list, description="List of column names returned by the query.")
     rows: List[Dict[str, Any]] = Field(default_factory=list, description="List of rows, where each row is a dictionary mapping column names to their values.")
     records_affected: int = Field(0, description="The number of records affected by the query.")
+
+class TabularQueryResult(BaseModel):
+    columns: List[str] = Field(default_factory=list, description="List of column names returned by the query.")
+    rows: List[Sequence[Any]] = Field(default_factory=list, description="List of rows, where each row holds the values in column order.")
+    records_affected: int = Field(0, description="The number of records affected by the query.")
+
+class ColumnarQueryResult(BaseModel):
+    columns: List[str] = Field(default_factory=list, description="List of column names returned by the query.")
+    data: List[List[Any]] = Field(default_factory=list, description="One array of values per column, in column order.")
+    row_count: int = Field(0, description="The number of rows returned by the query.")
+    records_affected: int = Field(0, description="The number of records affected by the query.")
+
+class ArrowQueryResult(BaseModel):
+    columns: List[str] = Field(default_factory=list, description="List of column names returned by the query.")
+    arrow_ipc: str = Field("", description="The rows as a base64-encoded Apache Arrow IPC stream.")
+    row_count: int = Field(0, description="The number of rows returned by the query.")
+    records_affected: int = Field(0, description="The number of records affected by the query.")
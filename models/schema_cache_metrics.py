@@ -0,0 +1,18 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from metrics import counter_field
+
+class SchemaCacheMetrics(BaseModel):
+    hits: int = counter_field("Requests served from the cached snapshot without reloading it.")
+    misses: int = counter_field("Requests that required a full schema load.")
+    shared_loads: int = counter_field("Snapshots adopted from another worker process instead of being loaded from the database.")
+    probes: int = counter_field("Change-detection probes run against INFORMATION_SCHEMA.TABLES.")
+    incremental_refreshes: int = counter_field("Probes that found changes and re-introspected only the changed tables.")
+    tables_refreshed: int = counter_field("Total number of tables re-introspected by incremental refreshes.")
+    cached_tables: int = Field(0, description="Number of tables in the current snapshot.")
+    table_hits: int = counter_field("Single-table lookups answered from the snapshot or the per-table cache.")
+    table_loads: int = counter_field("Single-table lookups that introspected the table because it was not cached or had changed.")
+    last_full_load_ms: Optional[float] = Field(None, description="Duration of the most recent full schema load.")
+    last_probe_ms: Optional[float] = Field(None, description="Duration of the most recent change-detection probe.")
+    last_refresh_ms: Optional[float] = Field(None, description="Duration of the most recent incremental refresh.")
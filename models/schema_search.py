@@ -0,0 +1,44 @@
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+from .table_schema import TableSchema
+
+class SchemaSearchRequest(BaseModel):
+    query: str = Field(..., min_length=1, description="Words to look for in table and column names; prefixes and misspellings also match.")
+    kind: Optional[Literal["table", "column"]] = Field(None, description="Only return tables or only columns.")
+    limit: int = Field(20, gt=0, le=200, description="Maximum number of hits.")
+
+class SchemaSearchHit(BaseModel):
+    table: str = Field(..., description="The matching table, or the table of the matching column.")
+    column: Optional[str] = Field(None, description="The matching column; absent when the table itself matched.")
+    data_type: Optional[str] = Field(None, description="The data type of the matching column.")
+    score: float = Field(..., description="Relevance; exact word matches score highest, then prefixes, then similar spellings.")
+
+class SchemaRelationship(BaseModel):
+    constraint: str = Field(..., description="The name of the foreign key constraint.")
+    table: str = Field(..., description="The referencing table.")
+    columns: List[str] = Field(default_factory=list, description="The foreign key columns of the referencing table.")
+    referenced_table: str = Field(..., description="The referenced table.")
+    referenced_columns: List[str] = Field(default_factory=list, description="The referenced columns, in the order of columns.")
+
+class SchemaNeighborhoodRequest(BaseModel):
+    table: str = Field(..., min_length=1, description="The table to start from.")
+    hops: int = Field(1, ge=1, le=4, description="Follow foreign keys (in either direction) at most this many times.")
+    limit: int = Field(100, gt=0, le=1000, description="Maximum number of tables returned, nearest first.")
+    include_columns: bool = Field(True, description="Return the full schema of each table instead of only its name.")
+
+class SchemaNeighborhood(BaseModel):
+    table: str = Field(..., description="The table the search started from.")
+    distances: Dict[str, int] = Field(default_factory=dict, description="Number of foreign key hops from the start table, per table.")
+    tables: List[TableSchema] = Field(default_factory=list, description="Schemas of the tables found, when include_columns is set.")
+    relationships: List[SchemaRelationship] = Field(default_factory=list, description="Foreign keys between the tables found.")
+    truncated: bool = Field(False, description="True when more tables were within reach than limit allowed.")
+
+class SchemaJoinPathRequest(BaseModel):
+    from_table: str = Field(..., min_length=1, description="The table to join from.")
+    to_table: str = Field(..., min_length=1, description="The table to reach.")
+    max_hops: int = Field(6, ge=1, le=12, description="Longest chain of joins considered.")
+
+class SchemaJoinPath(BaseModel):
+    tables: List[str] = Field(default_factory=list, description="The tables along the path, from from_table to to_table.")
+    steps: List[SchemaRelationship] = Field(default_factory=list, description="The foreign key used for each join, in path order.")
+    sql: str = Field("", description="A FROM ... JOIN ... ON clause following the path.")
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+from metrics import counter_field
+
+class SqlRewriteMetrics(BaseModel):
+    hits: int = counter_field("Total number of queries whose analysis was found in the cache.")
+    misses: int = counter_field("Total number of queries that had to be tokenized and analyzed.")
+    size: int = Field(0, description="Number of analyzed queries in the cache.")
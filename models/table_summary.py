@@ -0,0 +1,24 @@
+import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+class TableSummary(BaseModel):
+    name: str = Field(..., description="The name of the table.")
+    table_type: str = Field(..., description="BASE TABLE, VIEW or SYSTEM VIEW.")
+    engine: Optional[str] = Field(None, description="The storage engine; absent for views.")
+    row_estimate: Optional[int] = Field(None, description="Approximate number of rows from the engine's statistics; absent for views.")
+    data_bytes: Optional[int] = Field(None, description="Size of the table's data.")
+    index_bytes: Optional[int] = Field(None, description="Size of the table's indexes.")
+    update_time: Optional[datetime.datetime] = Field(None, description="When the table was last modified, if the engine tracks it.")
+
+class TablePage(BaseModel):
+    tables: List[TableSummary] = Field(default_factory=list, description="Tables in name order.")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page; absent on the last page.")
+
+class TableListRequest(BaseModel):
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page; omit for the first page.")
+    limit: int = Field(100, gt=0, le=1000, description="Maximum number of tables per page.")
+    prefix: Optional[str] = Field(None, description="Only list tables whose name starts with this prefix.")
+
+class TableDetailRequest(BaseModel):
+    name: str = Field(..., min_length=1, description="The table to describe.")
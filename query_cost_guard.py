@@ -0,0 +1,218 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Mapping, NamedTuple, Optional, Tuple
+
+import pymysql
+
+from config import DatabaseOptions
+from models.cost_guard_metrics import CostGuardMetrics
+from sql_rewriter import QueryParameters, QueryRejectedError, RewrittenQuery
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE_STATEMENTS = {"SELECT", "TABLE"}
+# Width assumed when the plan reports no data sizes (MariaDB, MySQL 5.6)
+DEFAULT_ROW_BYTES = 100.0
+_SIZE_SUFFIXES = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+# Plan nodes that wrap the join of a query block (sorting, grouping, ...)
+_OPERATION_KEYS = (
+    "ordering_operation", "grouping_operation", "duplicates_removal", "windowing",
+    "buffer_result", "filesort", "temporary_table"
+)
+_SUBQUERY_KEYS = (
+    "attached_subqueries", "subqueries", "optimized_away_subqueries", "select_list_subqueries",
+    "having_subqueries", "order_by_subqueries", "group_by_subqueries"
+)
+
+class CostEstimate(NamedTuple):
+    rows_examined: float
+    # Before any LIMIT; grouping is not accounted for, so this is an upper bound
+    result_rows: float
+    row_bytes: float
+
+class QueryCostExceededError(QueryRejectedError):
+    """Raised when the estimated cost of a query exceeds the cost_guard_* thresholds."""
+    def __init__(self, message: str, estimate: CostEstimate):
+        super().__init__(message)
+        self.estimate = estimate
+
+class StreamingRequiredError(QueryCostExceededError):
+    """
+    Raised with cost_guard_action "stream": the query should be run through open_query_stream
+    instead. Callers that cannot answer with a stream reject it like a QueryCostExceededError.
+    """
+    pass
+
+def estimate_cost(plan: Mapping[str, Any]) -> CostEstimate:
+    """Reads rows examined, result rows and row width from EXPLAIN FORMAT=JSON output."""
+    examined, produced, row_bytes = _estimate_block(plan.get("query_block", plan))
+    return CostEstimate(examined, produced, row_bytes or DEFAULT_ROW_BYTES)
+
+def _estimate_block(block: Mapping[str, Any]) -> Tuple[float, float, float]:
+    examined = 0.0
+    for key in _SUBQUERY_KEYS:
+        for subquery in block.get(key) or ():
+            if isinstance(subquery, Mapping) and "query_block" in subquery:
+                examined += _estimate_block(subquery["query_block"])[0]
+
+    union = block.get("union_result")
+    if isinstance(union, Mapping):
+        parts = [_estimate_block(spec.get("query_block", spec)) for spec in union.get("query_specifications") or ()]
+        return (
+            examined + sum(part[0] for part in parts),
+            sum(part[1] for part in parts),
+            max((part[2] for part in parts), default=0.0)
+        )
+
+    if "nested_loop" in block:
+        tables = [entry.get("table") or (entry.get("block-nl-join") or {}).get("table") for entry in block["nested_loop"]]
+    elif "table" in block:
+        tables = [block["table"]]
+    else:
+        for key in _OPERATION_KEYS:
+            if isinstance(block.get(key), Mapping):
+                inner = _estimate_block(block[key])
+                return examined + inner[0], inner[1], inner[2]
+        # No table access at all, e.g. "Select tables optimized away"
+        return examined, 1.0, 0.0
+
+    # Nested loop join: every table is scanned once per row produced by the tables before it
+    prefix_rows = 1.0
+    row_bytes = 0.0
+    for table in tables:
+        if not isinstance(table, Mapping):
+            continue
+        scanned = _number(table.get("rows_examined_per_scan", table.get("rows")))
+        examined += prefix_rows * scanned
+        materialized = table.get("materialized_from_subquery")
+        if isinstance(materialized, Mapping) and "query_block" in materialized:
+            examined += _estimate_block(materialized["query_block"])[0]
+        if "rows_produced_per_join" in table:
+            produced = _number(table["rows_produced_per_join"])
+        else:
+            produced = prefix_rows * scanned * _number(table.get("filtered", 100)) / 100
+        data_read = (table.get("cost_info") or {}).get("data_read_per_join")
+        if data_read is not None and produced > 0:
+            row_bytes += _size(data_read) / produced
+        prefix_rows = produced
+    return examined, prefix_rows, row_bytes
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _size(value: Any) -> float:
+    """Parses sizes such as 512, "7K" or "1G"."""
+    text = str(value).strip()
+    multiplier = _SIZE_SUFFIXES.get(text[-1:].upper())
+    return _number(text[:-1]) * multiplier if multiplier else _number(text)
+
+class QueryCostGuard:
+    """
+    Pre-flight check of SELECT statements against the cost_guard_* thresholds, using the
+    optimizer's estimates from EXPLAIN FORMAT=JSON. Each query shape (the statement with its
+    literals replaced by ?) is explained once and its estimate kept in an LRU of
+    cost_guard_cache_size shapes for cost_guard_cache_ttl_seconds, so repeated queries that
+    differ only in their values are checked without a round trip.
+
+    A query estimated to examine more than cost_guard_max_rows_examined rows is always
+    rejected, since neither a LIMIT nor streaming stops a scan that has to read the whole
+    table first. A query whose estimated result (after its LIMIT) exceeds
+    cost_guard_max_result_rows or cost_guard_max_result_bytes is rejected, given a LIMIT
+    that fits, or routed to streaming, per cost_guard_action. Estimates come from table
+    statistics and can be far off; a query whose EXPLAIN fails runs unchecked.
+    """
+    def __init__(self, options: DatabaseOptions, explain: Callable[[str, Optional[QueryParameters]], Awaitable[Mapping[str, Any]]]):
+        self._options = options
+        self._explain = explain
+        self._estimates: "OrderedDict[str, Tuple[float, Optional[CostEstimate]]]" = OrderedDict()
+        self._metrics = CostGuardMetrics()
+
+    @property
+    def enabled(self) -> bool:
+        options = self._options
+        return options.cost_guard_max_rows_examined > 0 or options.cost_guard_max_result_rows > 0 or options.cost_guard_max_result_bytes > 0
+
+    async def check(self, rewritten: RewrittenQuery, params: Optional[QueryParameters] = None, streaming: bool = False) -> Optional[int]:
+        """
+        Returns None when the query may run as it is, or the tighter LIMIT to run it with.
+        Raises QueryCostExceededError when it must not run, and StreamingRequiredError when it
+        should be streamed. Streamed queries are only checked for rows examined.
+        """
+        if not self.enabled or rewritten.statement_type not in EXPLAINABLE_STATEMENTS:
+            return None
+        estimate = await self._estimate(rewritten, params)
+        if estimate is None:
+            return None
+
+        max_examined = self._options.cost_guard_max_rows_examined
+        if max_examined > 0 and estimate.rows_examined > max_examined:
+            self._metrics.rejected += 1
+            raise QueryCostExceededError(
+                f"Query would examine about {estimate.rows_examined:,.0f} rows, more than the {max_examined:,} allowed; "
+                f"add selective conditions or use an indexed column",
+                estimate
+            )
+
+        result_rows = estimate.result_rows if rewritten.limit is None else min(estimate.result_rows, rewritten.limit)
+        allowed_rows = self._allowed_rows(estimate)
+        if streaming or allowed_rows is None or result_rows <= allowed_rows:
+            self._metrics.passed += 1
+            return None
+
+        action = self._options.cost_guard_action
+        if action == "limit" and allowed_rows >= 1:
+            self._metrics.limited += 1
+            logger.info(f"Cost guard limiting query to {int(allowed_rows)} rows (estimated {result_rows:,.0f})")
+            return int(allowed_rows)
+        message = (
+            f"Query would return about {result_rows:,.0f} rows (~{result_rows * estimate.row_bytes / 1024:,.0f} KiB), "
+            f"more than the {int(allowed_rows):,} allowed"
+        )
+        if action == "stream":
+            self._metrics.streamed += 1
+            raise StreamingRequiredError(message, estimate)
+        self._metrics.rejected += 1
+        raise QueryCostExceededError(f"{message}; add a tighter LIMIT or use query/stream", estimate)
+
+    def metrics(self) -> CostGuardMetrics:
+        self._metrics.entries = len(self._estimates)
+        return self._metrics.model_copy()
+
+    def clear(self) -> None:
+        self._estimates.clear()
+
+    def _allowed_rows(self, estimate: CostEstimate) -> Optional[float]:
+        limits = []
+        if self._options.cost_guard_max_result_rows > 0:
+            limits.append(float(self._options.cost_guard_max_result_rows))
+        if self._options.cost_guard_max_result_bytes > 0:
+            limits.append(self._options.cost_guard_max_result_bytes / estimate.row_bytes)
+        return min(limits) if limits else None
+
+    async def _estimate(self, rewritten: RewrittenQuery, params: Optional[QueryParameters]) -> Optional[CostEstimate]:
+        key = rewritten.shape or rewritten.sql
+        cached = self._estimates.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self._estimates.move_to_end(key)
+                self._metrics.cache_hits += 1
+                return cached[1]
+            del self._estimates[key]
+
+        self._metrics.explains += 1
+        try:
+            estimate = estimate_cost(await self._explain(rewritten.sql, params))
+        except (pymysql.MySQLError, ValueError, TypeError, AttributeError) as e:
+            # Remembered like an estimate, so the shape is not explained again on every call
+            self._metrics.explain_failures += 1
+            logger.info(f"Cost guard could not explain query, running it unchecked: {e}")
+            estimate = None
+
+        self._estimates[key] = (time.monotonic() + self._options.cost_guard_cache_ttl_seconds, estimate)
+        while len(self._estimates) > self._options.cost_guard_cache_size:
+            self._estimates.popitem(last=False)
+        return estimate
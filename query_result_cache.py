@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from config import DatabaseOptions
+from models.query_cache_metrics import QueryCacheMetrics
+from shared_cache_store import SharedCacheStore
+from sql_rewriter import QueryParameters, RewrittenQuery
+
+logger = logging.getLogger(__name__)
+
+# Statements whose result depends only on table data. SHOW, DESCRIBE and EXPLAIN report
+# definitions, statistics and plans, which change on DDL that the probe does not see
+CACHEABLE_STATEMENTS = {"SELECT", "TABLE", "VALUES"}
+
+class CachedResult(NamedTuple):
+    """Raw cursor output; the requested representation is built on every read."""
+    columns: List[str]
+    rows: Sequence[Sequence[Any]]
+    records_affected: int
+    # Positions of JSON columns, whose values the driver returns as text
+    json_columns: Sequence[int] = ()
+
+class _Entry:
+    __slots__ = ("result", "fingerprints", "expires_at", "size")
+
+    def __init__(self, result: CachedResult, fingerprints: Dict[str, str], expires_at: float, size: int):
+        self.result = result
+        self.fingerprints = fingerprints
+        self.expires_at = expires_at
+        self.size = size
+
+_CacheKey = Tuple[str, Hashable]
+
+class QueryResultCache:
+    """
+    In-process cache of query results keyed by the rewritten (normalized) SQL and its parameters.
+    Every entry records the INFORMATION_SCHEMA.TABLES fingerprint of the tables it reads from.
+    At most every query_cache_probe_interval_seconds the fingerprints are re-read, and entries
+    whose tables changed are dropped; entries also expire after query_cache_ttl_seconds.
+    Memory is bounded by an LRU byte budget (query_cache_max_bytes).
+
+    Only deterministic SELECT/TABLE/VALUES statements over base tables of the current database
+    are cached: views, other schemas and table-less statements cannot be validated by the probe.
+    UPDATE_TIME has a resolution of one second, so a write landing in the same second as the
+    probe that last read the table's fingerprint can go unnoticed until the entry expires.
+    Writes executed through the service invalidate the tables they touch immediately.
+
+    With a shared store, results are also published to the other worker processes, which
+    answer from them instead of running the query again, and the probe result is shared
+    so only one worker per interval queries INFORMATION_SCHEMA.
+    """
+    def __init__(
+        self,
+        options: DatabaseOptions,
+        probe: Callable[[], Awaitable[Dict[str, str]]],
+        shared: Optional[SharedCacheStore] = None
+    ):
+        self._options = options
+        self._probe = probe
+        self._shared = shared
+        self._entries: "OrderedDict[_CacheKey, _Entry]" = OrderedDict()
+        self._keys_by_table: Dict[str, Set[_CacheKey]] = {}
+        self._fingerprints: Optional[Dict[str, str]] = None
+        self._names_by_lower: Dict[str, str] = {}
+        self._probed_at = 0.0
+        self._probe_lock = asyncio.Lock()
+        self._bytes = 0
+        self._metrics = QueryCacheMetrics()
+
+    @property
+    def enabled(self) -> bool:
+        return self._options.query_cache_ttl_seconds > 0 and self._options.query_cache_max_bytes > 0
+
+    async def get_or_execute(
+        self,
+        rewritten: RewrittenQuery,
+        execute: Callable[[], Awaitable[CachedResult]],
+        params: Optional[QueryParameters] = None
+    ) -> CachedResult:
+        if not self.enabled:
+            return await execute()
+        if not rewritten.read_only:
+            result = await execute()
+            self.invalidate_tables(rewritten.tables)
+            if self._shared is not None:
+                self._shared.bump_tags([(self._resolve(table) or table).lower() for table in rewritten.tables])
+            return result
+
+        if not rewritten.tables or not rewritten.deterministic or rewritten.statement_type not in CACHEABLE_STATEMENTS:
+            # Known before probing, so uncacheable queries cost no extra round trip
+            self._metrics.uncacheable += 1
+            return await execute()
+
+        # Fingerprints are read before executing, so a change racing with the query
+        # makes the stored entry look stale rather than fresh
+        fingerprints = await self._current_fingerprints()
+        table_fingerprints = self._table_fingerprints(rewritten, fingerprints)
+        if table_fingerprints is None:
+            self._metrics.uncacheable += 1
+            return await execute()
+
+        key = (rewritten.sql, _parameters_key(params))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._metrics.expirations += 1
+            elif entry.fingerprints != table_fingerprints:
+                self._remove(key)
+                self._metrics.invalidations += 1
+            else:
+                self._entries.move_to_end(key)
+                self._metrics.hits += 1
+                return entry.result
+
+        shared_key = tag_versions = None
+        if self._shared is not None:
+            shared_key = repr(key)
+            shared_entry = self._shared.get(shared_key)
+            if shared_entry is not None and shared_entry[1] == table_fingerprints:
+                expires_at, _, result = shared_entry
+                self._store(key, result, table_fingerprints, expires_at - time.time())
+                self._metrics.hits += 1
+                self._metrics.shared_hits += 1
+                return result
+            # Read before executing, so a write racing with the query makes the shared entry stale
+            tag_versions = self._shared.tag_versions([name.lower() for name in table_fingerprints])
+
+        self._metrics.misses += 1
+        result = await execute()
+        if self._store(key, result, table_fingerprints) and shared_key is not None:
+            ttl = self._options.query_cache_ttl_seconds
+            self._shared.put(shared_key, (time.time() + ttl, table_fingerprints, result), ttl, tag_versions)
+        return result
+
+    def invalidate_tables(self, tables: Sequence[str]) -> None:
+        for table in tables:
+            name = self._resolve(table)
+            for key in list(self._keys_by_table.get(name or table, ())):
+                self._remove(key)
+                self._metrics.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_table.clear()
+        self._bytes = 0
+
+    def metrics(self) -> QueryCacheMetrics:
+        lookups = self._metrics.hits + self._metrics.misses
+        self._metrics.hit_ratio = self._metrics.hits / lookups if lookups else 0.0
+        self._metrics.entries = len(self._entries)
+        self._metrics.bytes = self._bytes
+        return self._metrics.model_copy()
+
+    async def _current_fingerprints(self) -> Dict[str, str]:
+        if self._fingerprints is not None and time.monotonic() - self._probed_at < self._options.query_cache_probe_interval_seconds:
+            return self._fingerprints
+        async with self._probe_lock:
+            # Another request may have probed while we waited for the lock
+            if self._fingerprints is not None and time.monotonic() - self._probed_at < self._options.query_cache_probe_interval_seconds:
+                return self._fingerprints
+            if self._shared is not None:
+                fingerprints = await self._shared.get_or_refresh(
+                    "query_cache:fingerprints", self._options.query_cache_probe_interval_seconds, self._run_probe
+                )
+            else:
+                fingerprints = await self._run_probe()
+            self._probed_at = time.monotonic()
+            if self._fingerprints is not None:
+                changed = [name for name, fingerprint in self._fingerprints.items() if fingerprints.get(name) != fingerprint]
+                if changed:
+                    logger.info(f"Query cache invalidating results for changed tables: {', '.join(changed)}")
+                    self.invalidate_tables(changed)
+            self._fingerprints = fingerprints
+            self._names_by_lower = {name.lower(): name for name in fingerprints}
+            return fingerprints
+
+    async def _run_probe(self) -> Dict[str, str]:
+        self._metrics.probes += 1
+        return await self._probe()
+
+    def _resolve(self, table: str) -> Optional[str]:
+        if self._fingerprints is None:
+            return None
+        if table in self._fingerprints:
+            return table
+        # Table names are case-insensitive when lower_case_table_names is set
+        return self._names_by_lower.get(table.lower())
+
+    def _table_fingerprints(self, rewritten: RewrittenQuery, fingerprints: Dict[str, str]) -> Optional[Dict[str, str]]:
+        result = {}
+        for table in rewritten.tables:
+            name = self._resolve(table)
+            if name is None:
+                return None
+            result[name] = fingerprints[name]
+        return result
+
+    def _store(self, key: _CacheKey, result: CachedResult, fingerprints: Dict[str, str], ttl_seconds: Optional[float] = None) -> bool:
+        size = _estimate_size(result, self._options.query_cache_max_entry_bytes)
+        if size is None:
+            return False
+        if key in self._entries:
+            self._remove(key)
+        ttl = self._options.query_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = _Entry(result, fingerprints, time.monotonic() + ttl, size)
+        self._bytes += size
+        for name in fingerprints:
+            self._keys_by_table.setdefault(name, set()).add(key)
+        while self._bytes > self._options.query_cache_max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self._metrics.evictions += 1
+        return True
+
+    def _remove(self, key: _CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for name in entry.fingerprints:
+            keys = self._keys_by_table.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[name]
+
+def _parameters_key(params: Optional[QueryParameters]) -> Hashable:
+    if params is None:
+        return None
+    if isinstance(params, Mapping):
+        return tuple(sorted((name, _parameters_key(value) if isinstance(value, list) else value) for name, value in params.items()))
+    return tuple(_parameters_key(value) if isinstance(value, list) else value for value in params)
+
+def _estimate_size(result: CachedResult, limit: int) -> Optional[int]:
+    """Approximate memory held by the result, or None as soon as it exceeds limit."""
+    getsizeof = sys.getsizeof
+    size = getsizeof(result.rows) + sum(map(getsizeof, result.columns))
+    for row in result.rows:
+        size += getsizeof(row) + sum(map(getsizeof, row))
+        if size > limit:
+            return None
+    return size
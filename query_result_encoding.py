@@ -0,0 +1,62 @@
+import base64
+import io
+from typing import Any, List, Sequence, Union
+
+from models.query_result import (
+    ArrowQueryResult, ColumnarQueryResult, QueryResult, QueryResultFormat, TabularQueryResult
+)
+from serialization import decode_json_columns
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError: # pyarrow is optional and only needed for the arrow result format
+    pyarrow = None
+
+AnyQueryResult = Union[QueryResult, TabularQueryResult, ColumnarQueryResult, ArrowQueryResult]
+
+def arrow_available() -> bool:
+    return pyarrow is not None
+
+def encode_query_result(
+    columns: List[str],
+    rows: Sequence[Sequence[Any]],
+    records_affected: int,
+    result_format: QueryResultFormat = QueryResultFormat.ROWS,
+    json_columns: Sequence[int] = ()
+) -> AnyQueryResult:
+    """
+    Builds the requested result representation from plain cursor rows (tuples).
+    Values come straight from the driver, so the models are constructed without
+    re-validating every cell. JSON columns are parsed into objects, except in the
+    arrow format, which keeps them as text.
+    """
+    if result_format != QueryResultFormat.ARROW:
+        rows = decode_json_columns(rows, json_columns)
+    if result_format == QueryResultFormat.TABULAR:
+        return TabularQueryResult.model_construct(
+            columns=columns, rows=rows if isinstance(rows, list) else list(rows), records_affected=records_affected
+        )
+    if result_format == QueryResultFormat.COLUMNAR:
+        data = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+        return ColumnarQueryResult.model_construct(
+            columns=columns, data=data, row_count=len(rows), records_affected=records_affected
+        )
+    if result_format == QueryResultFormat.ARROW:
+        return ArrowQueryResult.model_construct(
+            columns=columns, arrow_ipc=_to_arrow_ipc(columns, rows), row_count=len(rows), records_affected=records_affected
+        )
+    return QueryResult.model_construct(
+        columns=columns, rows=[dict(zip(columns, row)) for row in rows], records_affected=records_affected
+    )
+
+def _to_arrow_ipc(columns: List[str], rows: Sequence[Sequence[Any]]) -> str:
+    if pyarrow is None:
+        raise RuntimeError("The arrow result format requires the optional 'pyarrow' package")
+    arrays = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+    # Column names may repeat in a result set (e.g. joins), so arrays are positional
+    table = pyarrow.Table.from_arrays([pyarrow.array(values) for values in arrays], names=columns)
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue()).decode("ascii")
@@ -9,7 +9,19 @@ class JsonRpcLoggingBehavior(IJsonRpcPipelineBehavior):
         request: JsonRpcRequest,
         next_behavior: callable
     ) -> JsonRpcResponse:
+        # Skip formatting (and dumping the response) when INFO is disabled
+        if not logger.isEnabledFor(logging.INFO):
+            return await next_behavior(request)
+
         logger.info(f"Incoming RPC request: Method='{request.method}', ID='{request.id}'")
         response = await next_behavior(request)
-        logger.info(f"Outgoing RPC response for Method='{request.method}', ID='{request.id}': {response.dict()}")
+        if response is None:
+            return response
+        # Results can be large, so the payload is only logged at DEBUG level
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Outgoing RPC response for Method='{request.method}', ID='{request.id}': {response.model_dump()}")
+        elif response.error is not None:
+            logger.info(f"Outgoing RPC error for Method='{request.method}', ID='{request.id}': {response.error.code} {response.error.message}")
+        else:
+            logger.info(f"Outgoing RPC response for Method='{request.method}', ID='{request.id}'")
         return response
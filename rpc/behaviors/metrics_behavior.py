@@ -0,0 +1,55 @@
+from rpc.json_rpc_interfaces import IJsonRpcPipelineBehavior, JsonRpcRequest, JsonRpcResponse
+from metrics import MetricsRegistry, Trace, current_trace
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Requests for unknown methods share one label so clients cannot grow the series without bound
+UNKNOWN_METHOD = "unknown"
+METHOD_NOT_FOUND = -32601
+
+class JsonRpcMetricsBehavior(IJsonRpcPipelineBehavior):
+    """
+    Records per-method latency, outcome and in-flight counts. When slow_request_threshold_ms
+    is set, each request is traced: database stages add spans to it, and requests slower
+    than the threshold are logged with their breakdown and kept for /api/mysql/traces.
+    Streamed methods are measured until their response starts.
+    """
+    def __init__(self, registry: MetricsRegistry, slow_request_threshold_ms: float = 0):
+        self.registry = registry
+        self.slow_request_threshold_ms = slow_request_threshold_ms
+
+    async def handle(
+        self,
+        request: JsonRpcRequest,
+        next_behavior: callable
+    ) -> JsonRpcResponse:
+        registry = self.registry
+        trace = token = None
+        if self.slow_request_threshold_ms > 0:
+            trace = Trace(name=request.method, started_at=time.time())
+            token = current_trace.set(trace)
+        registry.rpc_in_flight.inc()
+        started = time.perf_counter()
+        outcome = "error"
+        method = request.method
+        try:
+            response = await next_behavior(request)
+            if response is not None and response.error is not None:
+                if response.error.code == METHOD_NOT_FOUND:
+                    method = UNKNOWN_METHOD
+            else:
+                outcome = "ok"
+            return response
+        finally:
+            registry.rpc_in_flight.dec()
+            registry.rpc_duration.observe(time.perf_counter() - started, method)
+            registry.rpc_requests.inc(method, outcome)
+            if trace is not None:
+                current_trace.reset(token)
+                trace.name = method
+                trace.finish()
+                if trace.duration_ms >= self.slow_request_threshold_ms:
+                    logger.warning(f"Slow RPC request: {trace.summary()}")
+                    registry.record_slow_trace(trace)
@@ -1,4 +1,5 @@
 from rpc.json_rpc_interfaces import IJsonRpcHandler, JsonRpcRequest, JsonRpcResponse
+from rpc.transports.json_rpc_session import current_session
 from pydantic import BaseModel
 from typing import Dict, Any
 
@@ -14,6 +15,10 @@ class InitializeHandler(IJsonRpcHandler):
     async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
         # The 'params' of an initialize request typically contain client capabilities.
         # For this example, we'll just acknowledge the initialization.
+        # Persistent sessions remember them for the lifetime of the connection.
+        session = current_session.get()
+        if session is not None:
+            session.state["client_params"] = request.params
         return JsonRpcResponse(
             id=request.id,
             result=InitializeResult(
@@ -0,0 +1,39 @@
+from pydantic import ValidationError
+from rpc.json_rpc_interfaces import IJsonRpcHandler, JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from database_service import DatabaseService
+from models.query_batch import QueryBatchRequest
+
+class QueryBatchHandler(IJsonRpcHandler):
+    """
+    Runs several independent statements concurrently and returns one result or error per
+    statement, so multi-fact lookups take about as long as the slowest statement.
+    """
+    def __init__(self, db_service: DatabaseService, max_statements: int = 50, max_concurrency: int = 4, timeout_seconds: float = 30.0):
+        self._db_service = db_service
+        self._max_statements = max_statements
+        self._max_concurrency = max_concurrency
+        self._timeout_seconds = timeout_seconds
+
+    @property
+    def method_name(self) -> str:
+        return "query/batch"
+
+    async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
+        try:
+            batch = QueryBatchRequest.model_validate(request.params if isinstance(request.params, dict) else {})
+        except ValidationError as e:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params", data=e.errors(include_url=False))
+            )
+        if len(batch.queries) > self._max_statements:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message=f"Invalid params: at most {self._max_statements} queries are allowed per batch")
+            )
+
+        # Clients may ask for less parallelism or a shorter deadline, never for more
+        max_concurrency = min(batch.max_concurrency or self._max_concurrency, self._max_concurrency)
+        timeout_seconds = min(batch.timeout_seconds or self._timeout_seconds, self._timeout_seconds)
+        result = await self._db_service.execute_query_batch(batch.queries, max_concurrency, timeout_seconds)
+        return JsonRpcResponse(id=request.id, result=result)
@@ -0,0 +1,76 @@
+from rpc.json_rpc_interfaces import IJsonRpcHandler, JsonRpcRequest, JsonRpcResponse, JsonRpcError, in_batch
+from database_pool import PoolExhaustedError
+from database_service import DatabaseService, QueryTimeoutError
+from query_cost_guard import StreamingRequiredError
+from rpc.handlers.query_stream_handler import QueryStreamResult
+from sql_rewriter import QueryRejectedError
+from models.query_result import QueryResultFormat
+from query_result_encoding import arrow_available
+import pymysql
+
+class QueryExecuteHandler(IJsonRpcHandler):
+    def __init__(self, db_service: DatabaseService):
+        self._db_service = db_service
+
+    @property
+    def method_name(self) -> str:
+        return "query/execute"
+
+    async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
+        params = request.params if isinstance(request.params, dict) else {}
+        query = params.get("query")
+        query_params = params.get("params")
+        if not isinstance(query, str) or not query.strip():
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params: 'query' must be a non-empty string")
+            )
+        if query_params is not None and not isinstance(query_params, (list, dict)):
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params: 'params' must be an array or an object")
+            )
+
+        try:
+            result_format = QueryResultFormat(params.get("format", QueryResultFormat.ROWS.value))
+        except ValueError:
+            formats = ", ".join(f.value for f in QueryResultFormat)
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message=f"Invalid params: 'format' must be one of {formats}")
+            )
+        if result_format == QueryResultFormat.ARROW and not arrow_available():
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params: the arrow format requires pyarrow on the server")
+            )
+
+        try:
+            try:
+                result = await self._db_service.execute_query(query, result_format, query_params)
+            except StreamingRequiredError as e:
+                # Streams carry rows only, and a batch has no place for incremental output
+                if in_batch.get():
+                    return self._too_large(request, e, "to return inside a batch")
+                if result_format != QueryResultFormat.ROWS:
+                    return self._too_large(request, e, f"for the {result_format.value} format")
+                # Answered like query/stream: row notifications, then the final result
+                stream = await self._db_service.open_query_stream(query, params=query_params)
+                return JsonRpcResponse(id=request.id, result=QueryStreamResult(request.id, stream))
+        except QueryRejectedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32602, message=f"Query rejected: {str(e)}"))
+        except QueryTimeoutError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Query timed out: {str(e)}"))
+        except PoolExhaustedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Database is busy: {str(e)}"))
+        except pymysql.MySQLError as e:
+            # Syntax errors, unknown columns, missing privileges: the query's fault, like a rejection
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32602, message=f"Query failed: {str(e)}"))
+        return JsonRpcResponse(id=request.id, result=result)
+
+    @staticmethod
+    def _too_large(request: JsonRpcRequest, error: StreamingRequiredError, reason: str) -> JsonRpcResponse:
+        return JsonRpcResponse(
+            id=request.id,
+            error=JsonRpcError(code=-32602, message=f"Query rejected: {str(error)}; the result is too large {reason}, use query/stream")
+        )
@@ -0,0 +1,77 @@
+from rpc.json_rpc_interfaces import IJsonRpcHandler, IJsonRpcStreamingResult, JsonRpcRequest, JsonRpcResponse, JsonRpcError, in_batch
+from database_pool import PoolExhaustedError
+from database_service import DatabaseService, QueryStream, QueryTimeoutError
+from sql_rewriter import QueryRejectedError
+from typing import Any, AsyncIterator, Dict, Optional, Union
+import pymysql
+
+class QueryStreamResult(IJsonRpcStreamingResult):
+    def __init__(self, request_id: Optional[Union[int, str]], stream: QueryStream):
+        self._request_id = request_id
+        self._stream = stream
+
+    @property
+    def notification_method(self) -> str:
+        return "notifications/query/rows"
+
+    async def chunks(self) -> AsyncIterator[Dict[str, Any]]:
+        async for rows in self._stream.batches():
+            yield {"requestId": self._request_id, "columns": self._stream.columns, "rows": rows}
+
+    def final_result(self) -> Dict[str, Any]:
+        return {
+            "columns": self._stream.columns,
+            "row_count": self._stream.row_count,
+            "records_affected": self._stream.records_affected
+        }
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+class QueryStreamHandler(IJsonRpcHandler):
+    def __init__(self, db_service: DatabaseService):
+        self._db_service = db_service
+
+    @property
+    def method_name(self) -> str:
+        return "query/stream"
+
+    async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
+        params = request.params if isinstance(request.params, dict) else {}
+        query = params.get("query")
+        batch_size = params.get("batch_size")
+        query_params = params.get("params")
+        if not isinstance(query, str) or not query.strip():
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params: 'query' must be a non-empty string")
+            )
+        if batch_size is not None and (not isinstance(batch_size, int) or batch_size <= 0):
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params: 'batch_size' must be a positive integer")
+            )
+        if query_params is not None and not isinstance(query_params, (list, dict)):
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params: 'params' must be an array or an object")
+            )
+
+        if in_batch.get():
+            # Refused before the query runs, rather than opened and closed again by the router
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32600, message=f"Invalid Request: {self.method_name} cannot be used in a batch")
+            )
+
+        try:
+            stream = await self._db_service.open_query_stream(query, batch_size, query_params)
+        except QueryRejectedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32602, message=f"Query rejected: {str(e)}"))
+        except QueryTimeoutError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Query timed out: {str(e)}"))
+        except PoolExhaustedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Database is busy: {str(e)}"))
+        except pymysql.MySQLError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32602, message=f"Query failed: {str(e)}"))
+        return JsonRpcResponse(id=request.id, result=QueryStreamResult(request.id, stream))
@@ -0,0 +1,39 @@
+from pydantic import ValidationError
+from rpc.json_rpc_interfaces import IJsonRpcHandler, JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from database_pool import PoolExhaustedError
+from schema_cache import SchemaCache
+from models.schema_search import SchemaJoinPathRequest
+
+class SchemaJoinPathHandler(IJsonRpcHandler):
+    """
+    Returns the shortest chain of foreign keys joining two tables, with a ready FROM ... JOIN clause.
+    The result is null when the tables are not connected within max_hops.
+    """
+    def __init__(self, schema_cache: SchemaCache):
+        self._schema_cache = schema_cache
+
+    @property
+    def method_name(self) -> str:
+        return "schema/joinPath"
+
+    async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
+        try:
+            path_request = SchemaJoinPathRequest.model_validate(request.params if isinstance(request.params, dict) else {})
+        except ValidationError as e:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params", data=e.errors(include_url=False))
+            )
+
+        try:
+            snapshot = await self._schema_cache.get_snapshot()
+        except PoolExhaustedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Database is busy: {str(e)}"))
+        try:
+            path = snapshot.index.join_path(path_request.from_table, path_request.to_table, path_request.max_hops)
+        except KeyError as e:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message=f"Invalid params: unknown table '{e.args[0]}'")
+            )
+        return JsonRpcResponse(id=request.id, result=path)
@@ -0,0 +1,40 @@
+from pydantic import ValidationError
+from rpc.json_rpc_interfaces import IJsonRpcHandler, JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from database_pool import PoolExhaustedError
+from schema_cache import SchemaCache
+from models.schema_search import SchemaNeighborhoodRequest
+
+class SchemaNeighborhoodHandler(IJsonRpcHandler):
+    """Returns the tables within N foreign key hops of a table, with the foreign keys between them."""
+    def __init__(self, schema_cache: SchemaCache):
+        self._schema_cache = schema_cache
+
+    @property
+    def method_name(self) -> str:
+        return "schema/neighborhood"
+
+    async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
+        try:
+            neighborhood_request = SchemaNeighborhoodRequest.model_validate(request.params if isinstance(request.params, dict) else {})
+        except ValidationError as e:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params", data=e.errors(include_url=False))
+            )
+
+        try:
+            snapshot = await self._schema_cache.get_snapshot()
+        except PoolExhaustedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Database is busy: {str(e)}"))
+        neighborhood = snapshot.index.neighborhood(
+            neighborhood_request.table,
+            neighborhood_request.hops,
+            neighborhood_request.limit,
+            neighborhood_request.include_columns
+        )
+        if neighborhood is None:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message=f"Invalid params: unknown table '{neighborhood_request.table}'")
+            )
+        return JsonRpcResponse(id=request.id, result=neighborhood)
@@ -0,0 +1,29 @@
+from pydantic import ValidationError
+from rpc.json_rpc_interfaces import IJsonRpcHandler, JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from database_pool import PoolExhaustedError
+from schema_cache import SchemaCache
+from models.schema_search import SchemaSearchRequest
+
+class SchemaSearchHandler(IJsonRpcHandler):
+    """Finds tables and columns by name (words, prefixes or misspellings) without returning the whole schema."""
+    def __init__(self, schema_cache: SchemaCache):
+        self._schema_cache = schema_cache
+
+    @property
+    def method_name(self) -> str:
+        return "schema/search"
+
+    async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
+        try:
+            search = SchemaSearchRequest.model_validate(request.params if isinstance(request.params, dict) else {})
+        except ValidationError as e:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params", data=e.errors(include_url=False))
+            )
+
+        try:
+            snapshot = await self._schema_cache.get_snapshot()
+        except PoolExhaustedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Database is busy: {str(e)}"))
+        return JsonRpcResponse(id=request.id, result=snapshot.index.search(search.query, search.kind, search.limit))
@@ -0,0 +1,34 @@
+from pydantic import ValidationError
+from rpc.json_rpc_interfaces import IJsonRpcHandler, JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from database_pool import PoolExhaustedError
+from schema_cache import SchemaCache
+from models.table_summary import TableDetailRequest
+
+class SchemaTableHandler(IJsonRpcHandler):
+    """Describes a single table (columns, primary key, foreign keys) without loading the whole schema."""
+    def __init__(self, schema_cache: SchemaCache):
+        self._schema_cache = schema_cache
+
+    @property
+    def method_name(self) -> str:
+        return "schema/table"
+
+    async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
+        try:
+            detail_request = TableDetailRequest.model_validate(request.params if isinstance(request.params, dict) else {})
+        except ValidationError as e:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params", data=e.errors(include_url=False))
+            )
+
+        try:
+            table = await self._schema_cache.get_table(detail_request.name)
+        except PoolExhaustedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Database is busy: {str(e)}"))
+        if table is None:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message=f"Invalid params: unknown table '{detail_request.name}'")
+            )
+        return JsonRpcResponse(id=request.id, result=table)
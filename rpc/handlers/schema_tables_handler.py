@@ -0,0 +1,29 @@
+from pydantic import ValidationError
+from rpc.json_rpc_interfaces import IJsonRpcHandler, JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from database_pool import PoolExhaustedError
+from database_service import DatabaseService
+from models.table_summary import TableListRequest
+
+class SchemaTablesHandler(IJsonRpcHandler):
+    """Lists tables with their row and size estimates, one page at a time."""
+    def __init__(self, db_service: DatabaseService):
+        self._db_service = db_service
+
+    @property
+    def method_name(self) -> str:
+        return "schema/tables"
+
+    async def handle(self, request: JsonRpcRequest) -> JsonRpcResponse:
+        try:
+            list_request = TableListRequest.model_validate(request.params if isinstance(request.params, dict) else {})
+            page = await self._db_service.list_tables(list_request.cursor, list_request.limit, list_request.prefix)
+        except ValidationError as e:
+            return JsonRpcResponse(
+                id=request.id,
+                error=JsonRpcError(code=-32602, message="Invalid params", data=e.errors(include_url=False))
+            )
+        except ValueError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32602, message=f"Invalid params: {str(e)}"))
+        except PoolExhaustedError as e:
+            return JsonRpcResponse(id=request.id, error=JsonRpcError(code=-32000, message=f"Database is busy: {str(e)}"))
+        return JsonRpcResponse(id=request.id, result=page)
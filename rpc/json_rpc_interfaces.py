@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from pydantic import BaseModel, Field
 
 # --- JSON RPC Models ---
@@ -20,7 +21,37 @@ class JsonRpcResponse(BaseModel):
     error: Optional[JsonRpcError] = None
     id: Optional[Union[int, str]] = None
 
+# True while a request of a JSON-RPC batch is handled, where streaming results cannot be used
+in_batch: ContextVar[bool] = ContextVar("in_batch", default=False)
+
 # --- JSON RPC Interfaces ---
+class IJsonRpcStreamingResult(ABC):
+    """
+    Result of a handler that produces its output incrementally.
+    Transports emit every chunk as a notification and finish with the final result.
+    """
+    @property
+    @abstractmethod
+    def notification_method(self) -> str:
+        """The notification method used for each chunk."""
+        pass
+
+    @abstractmethod
+    def chunks(self) -> AsyncIterator[Any]:
+        """Yields the notification params for each chunk."""
+        pass
+
+    @abstractmethod
+    def final_result(self) -> Any:
+        """The result sent in the response once all chunks have been emitted."""
+        pass
+
+    @abstractmethod
+    async def aclose(self) -> None:
+        """Releases resources when the result is abandoned before completion."""
+        pass
+
+
 class IJsonRpcHandler(ABC):
     """
     Abstract base class for JSON RPC handlers.
@@ -1,25 +1,39 @@
-from typing import Dict, List, Optional
-from rpc.json_rpc_interfaces import IJsonRpcHandler, IJsonRpcPipelineBehavior, JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pydantic import ValidationError
+from rpc.json_rpc_interfaces import IJsonRpcHandler, IJsonRpcPipelineBehavior, IJsonRpcStreamingResult, JsonRpcRequest, JsonRpcResponse, JsonRpcError, in_batch
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 class JsonRpcRouter:
+    """
+    Dispatches requests to handlers through the behavior pipeline.
+    The pipeline is composed once, when the router is built or rebuilt, so a
+    request only pays for the behavior calls themselves.
+    """
     def __init__(
         self,
         handlers: List[IJsonRpcHandler],
-        behaviors: List[IJsonRpcPipelineBehavior]
+        behaviors: List[IJsonRpcPipelineBehavior],
+        batch_max_concurrency: int = 8,
+        batch_max_size: int = 100
     ):
-        self._handlers: Dict[str, IJsonRpcHandler] = {handler.method_name: handler for handler in handlers}
-        self._behaviors = behaviors
+        self.batch_max_concurrency = batch_max_concurrency
+        self.batch_max_size = batch_max_size
+        self.rebuild(handlers, behaviors)
 
-    async def handle_async(self, request: JsonRpcRequest) -> Optional[JsonRpcResponse]:
-        if request.id is None:
-            # Notifications do not require a response
-            return None
+    def rebuild(
+        self,
+        handlers: List[IJsonRpcHandler],
+        behaviors: List[IJsonRpcPipelineBehavior]
+    ) -> None:
+        """Replaces the handlers and behaviors, e.g. after handlers were hot-reloaded."""
+        handler_map: Dict[str, IJsonRpcHandler] = {handler.method_name: handler for handler in handlers}
 
         async def _execute_handler(req: JsonRpcRequest) -> JsonRpcResponse:
-            handler = self._handlers.get(req.method)
+            handler = handler_map.get(req.method)
             if not handler:
                 return JsonRpcResponse(
                     id=req.id,
@@ -28,16 +42,74 @@ class JsonRpcRouter:
             return await handler.handle(req)
 
         # Build the pipeline
-        pipeline = _execute_handler
-        for behavior in reversed(self._behaviors):
-            next_pipeline_step = pipeline
-            pipeline = lambda req: behavior.handle(req, next_pipeline_step)
-        
+        pipeline: Callable[[JsonRpcRequest], Awaitable[JsonRpcResponse]] = _execute_handler
+        for behavior in reversed(behaviors):
+            pipeline = partial(behavior.handle, next_behavior=pipeline)
+
+        # Swap both at once so in-flight requests keep a consistent view
+        self._handlers, self._behaviors, self._pipeline = handler_map, list(behaviors), pipeline
+
+    @property
+    def methods(self) -> List[str]:
+        return list(self._handlers)
+
+    async def handle_async(self, request: JsonRpcRequest) -> Optional[JsonRpcResponse]:
+        if request.id is None:
+            # Notifications do not require a response
+            return None
+
         try:
-            return await pipeline(request)
+            return await self._pipeline(request)
         except Exception as e:
             logger.exception(f"Unhandled exception during RPC request: {request.method}")
             return JsonRpcResponse(
                 id=request.id,
                 error=JsonRpcError(code=-32000, message=f"Internal server error: {str(e)}")
             )
+
+    def check_batch(self, batch: List[Any]) -> Optional[JsonRpcResponse]:
+        """Returns the single error response owed for an empty or oversized batch, if any."""
+        if not batch:
+            return JsonRpcResponse(error=JsonRpcError(code=-32600, message="Invalid Request: empty batch"))
+        if len(batch) > self.batch_max_size:
+            return JsonRpcResponse(
+                error=JsonRpcError(code=-32600, message=f"Invalid Request: batch exceeds {self.batch_max_size} requests")
+            )
+        return None
+
+    async def handle_batch_async(self, batch: List[Any]) -> List[JsonRpcResponse]:
+        """
+        Handles a JSON-RPC 2.0 batch that passed check_batch. Requests are dispatched
+        concurrently, at most batch_max_concurrency at a time, and responses are returned
+        in request order. Notifications produce no response; invalid entries produce an
+        error response.
+        """
+
+        semaphore = asyncio.Semaphore(max(1, self.batch_max_concurrency))
+
+        async def _handle_entry(entry: Any) -> Optional[JsonRpcResponse]:
+            try:
+                request = entry if isinstance(entry, JsonRpcRequest) else JsonRpcRequest.model_validate(entry)
+            except ValidationError as e:
+                return JsonRpcResponse(
+                    error=JsonRpcError(code=-32600, message="Invalid Request", data=e.errors(include_url=False))
+                )
+            async with semaphore:
+                response = await self.handle_async(request)
+            if response is not None and isinstance(response.result, IJsonRpcStreamingResult):
+                # A batch answers with a single array, so there is no place for incremental output.
+                # Streaming handlers check in_batch and refuse up front; this catches any that do not
+                await response.result.aclose()
+                return JsonRpcResponse(
+                    id=request.id,
+                    error=JsonRpcError(code=-32600, message=f"Invalid Request: {request.method} cannot be used in a batch")
+                )
+            return response
+
+        # The tasks started by gather copy the context, and with it the flag
+        token = in_batch.set(True)
+        try:
+            responses = await asyncio.gather(*(_handle_entry(entry) for entry in batch))
+        finally:
+            in_batch.reset(token)
+        return [response for response in responses if response is not None]
@@ -0,0 +1,28 @@
+from typing import Any, AsyncIterator
+from rpc.json_rpc_interfaces import IJsonRpcStreamingResult, JsonRpcResponse, JsonRpcError
+import logging
+
+logger = logging.getLogger(__name__)
+
+def is_streaming_response(response: JsonRpcResponse) -> bool:
+    return response is not None and isinstance(response.result, IJsonRpcStreamingResult)
+
+async def iterate_streaming_response(response: JsonRpcResponse) -> AsyncIterator[Any]:
+    """
+    Expands a response carrying an IJsonRpcStreamingResult into JSON-RPC messages:
+    one notification per chunk followed by the final response.
+    """
+    result: IJsonRpcStreamingResult = response.result
+    try:
+        async for params in result.chunks():
+            yield {"jsonrpc": "2.0", "method": result.notification_method, "params": params}
+        final = JsonRpcResponse(id=response.id, result=result.final_result())
+    except Exception as e:
+        logger.exception(f"Exception while streaming RPC response for ID='{response.id}'")
+        final = JsonRpcResponse(
+            id=response.id,
+            error=JsonRpcError(code=-32000, message=f"Internal server error: {str(e)}")
+        )
+    finally:
+        await result.aclose()
+    yield final
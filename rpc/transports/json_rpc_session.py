@@ -0,0 +1,118 @@
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Union
+from pydantic import ValidationError
+from rpc.json_rpc_interfaces import JsonRpcRequest, JsonRpcResponse, JsonRpcError
+from rpc.json_rpc_router import JsonRpcRouter
+from rpc.json_rpc_streaming import is_streaming_response, iterate_streaming_response
+from serialization import loads
+import asyncio
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_session_ids = itertools.count(1)
+
+current_session: ContextVar[Optional["JsonRpcSession"]] = ContextVar("current_session", default=None)
+
+class JsonRpcSession:
+    """
+    A long-lived JSON-RPC connection (stdio, WebSocket) sharing the application's router.
+    Incoming messages are dispatched as independent tasks, so several requests can be in
+    flight and their responses are sent as soon as each completes, possibly out of order.
+    At most max_in_flight requests run at once; beyond that receive() waits, which stops
+    the transport from reading further messages.
+    """
+    def __init__(
+        self,
+        router: JsonRpcRouter,
+        send: Callable[[Any], Awaitable[None]],
+        max_in_flight: int = 32,
+        transport: str = "session"
+    ):
+        self.id = f"{transport}-{next(_session_ids)}"
+        self.state: Dict[str, Any] = {}
+        self.created_at = time.time()
+        self.requests_handled = 0
+        self._router = router
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max(1, max_in_flight))
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def receive(self, raw: Union[str, bytes]) -> None:
+        """Parses one incoming message and schedules it for dispatch."""
+        try:
+            message = loads(raw)
+        except ValueError as e:
+            await self.send(JsonRpcResponse(error=JsonRpcError(code=-32700, message=f"Parse error: {str(e)}")))
+            return
+
+        await self._in_flight.acquire()
+        task = asyncio.create_task(self._dispatch(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    async def send(self, message: Any) -> None:
+        # Messages from concurrent requests must not interleave on the wire
+        async with self._send_lock:
+            await self._send(message)
+
+    async def close(self) -> None:
+        """Cancels in-flight requests, e.g. when the peer disconnected."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def drain(self) -> None:
+        """Waits until every in-flight request has been answered."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._in_flight.release()
+
+    async def _dispatch(self, message: Any) -> None:
+        current_session.set(self)
+        try:
+            if isinstance(message, list):
+                batch_error = self._router.check_batch(message)
+                if batch_error is not None:
+                    await self.send(batch_error)
+                    return
+                responses = await self._router.handle_batch_async(message)
+                self.requests_handled += len(message)
+                if responses:
+                    await self.send(responses)
+                return
+
+            try:
+                request = JsonRpcRequest.model_validate(message)
+            except ValidationError as e:
+                request_id = message.get("id") if isinstance(message, dict) else None
+                await self.send(JsonRpcResponse(
+                    id=request_id if isinstance(request_id, (int, str)) else None,
+                    error=JsonRpcError(code=-32600, message="Invalid Request", data=e.errors(include_url=False))
+                ))
+                return
+
+            response = await self._router.handle_async(request)
+            self.requests_handled += 1
+            if response is None:
+                return
+            if is_streaming_response(response):
+                async for streamed in iterate_streaming_response(response):
+                    await self.send(streamed)
+            else:
+                await self.send(response)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Failed to dispatch message on session {self.id}")
@@ -0,0 +1,42 @@
+from rpc.json_rpc_router import JsonRpcRouter
+from rpc.transports.json_rpc_session import JsonRpcSession
+from serialization import dumps_line
+from typing import Any
+import asyncio
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Large results are sent as a single line, so allow long lines in both directions
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+async def run_stdio_session(router: JsonRpcRouter, max_in_flight: int = 32) -> None:
+    """
+    Serves one JSON-RPC session over newline-delimited JSON on stdin/stdout until stdin closes.
+    Logging must not write to stdout in this mode.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE_BYTES)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    write_transport, write_protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(write_transport, write_protocol, None, loop)
+
+    async def send(message: Any) -> None:
+        writer.write(dumps_line(message))
+        # Waits while the client is not reading, so a slow consumer throttles the session
+        await writer.drain()
+
+    session = JsonRpcSession(router, send, max_in_flight=max_in_flight, transport="stdio")
+    logger.info(f"Serving JSON-RPC over stdio (session {session.id})")
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                await session.receive(line)
+        await session.drain()
+    finally:
+        await session.close()
+        writer.close()
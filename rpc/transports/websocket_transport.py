@@ -0,0 +1,36 @@
+from fastapi import WebSocket, WebSocketDisconnect
+from rpc.json_rpc_interfaces import JsonRpcError, JsonRpcResponse
+from rpc.json_rpc_router import JsonRpcRouter
+from rpc.transports.json_rpc_session import JsonRpcSession
+from serialization import dumps
+from typing import Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def serve_websocket_session(websocket: WebSocket, router: JsonRpcRouter, max_in_flight: int = 32) -> None:
+    """Serves one JSON-RPC session over a WebSocket; each text frame carries one message or batch."""
+    await websocket.accept()
+
+    async def send(message: Any) -> None:
+        await websocket.send_text(dumps(message).decode("utf-8"))
+
+    session = JsonRpcSession(router, send, max_in_flight=max_in_flight, transport="ws")
+    logger.info(f"WebSocket session {session.id} opened")
+    try:
+        while True:
+            # receive_text() fails on binary frames and would drop the whole session
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            if frame.get("text") is not None:
+                await session.receive(frame["text"])
+            else:
+                await session.send(JsonRpcResponse(
+                    error=JsonRpcError(code=-32700, message="Parse error: binary frames are not supported; send JSON as text frames")
+                ))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await session.close()
+        logger.info(f"WebSocket session {session.id} closed after {session.requests_handled} requests")
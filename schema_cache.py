@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+from config import DatabaseOptions
+from database_service import DatabaseService
+from features.schema_index.schema_index import SchemaIndex
+from models.schema_cache_metrics import SchemaCacheMetrics
+from models.table_schema import TableSchema
+from serialization import dumps
+from shared_cache_store import SharedCacheStore
+
+logger = logging.getLogger(__name__)
+
+# Keys of the shared store: the tables are rewritten only when the snapshot changes,
+# the (small) probe state after every refresh
+SHARED_TABLES_KEY = "schema_cache:tables"
+SHARED_PROBE_KEY = "schema_cache:probe"
+
+class SchemaSnapshot:
+    """
+    An immutable view of the cached schema together with its serialized JSON body, ETag and
+    search index. The body and index are built once per refresh and served as-is on every request.
+    """
+    def __init__(self, tables: List[TableSchema]):
+        self.tables = tables
+        self.body = dumps(tables)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.index = SchemaIndex(tables)
+
+class _TableEntry:
+    __slots__ = ("table", "fingerprint", "loaded_at", "probed_at")
+
+    def __init__(self, table: TableSchema, fingerprint: str, loaded_at: float):
+        self.table = table
+        self.fingerprint = fingerprint
+        self.loaded_at = self.probed_at = loaded_at
+
+class SchemaCache:
+    """
+    In-process cache of the database schema.
+    Between probes the snapshot is served as-is. Once the probe interval has elapsed,
+    INFORMATION_SCHEMA.TABLES timestamps are compared with the ones recorded at load time
+    and only tables that were created, altered or dropped are re-introspected.
+    After schema_cache_ttl_seconds the whole schema is reloaded regardless.
+
+    get_table() describes single tables without loading the whole schema. Each table is cached
+    on its own and revalidated by probing only its own INFORMATION_SCHEMA.TABLES row.
+
+    With a shared store, worker processes take turns: the worker that finds the snapshot stale
+    refreshes it and publishes the result, and the others adopt it without querying the database.
+    """
+    def __init__(self, db_service: DatabaseService, options: DatabaseOptions, shared: Optional[SharedCacheStore] = None):
+        self._db_service = db_service
+        self._options = options
+        self._shared = shared
+        # Wall-clock probe time of the shared state last adopted or published
+        self._shared_probed_at = 0.0
+        self._lock = asyncio.Lock()
+        self._tables: Dict[str, TableSchema] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._loaded_at = 0.0
+        self._probed_at = 0.0
+        self._table_entries: Dict[str, _TableEntry] = {}
+        self._table_loads: Dict[str, asyncio.Future] = {}
+        # From lower_case_table_names, read on the first get_table()
+        self._case_insensitive_names: Optional[bool] = None
+        self._metrics = SchemaCacheMetrics()
+
+    async def get_snapshot(self) -> SchemaSnapshot:
+        if self._is_fresh():
+            self._metrics.hits += 1
+            return self._snapshot
+
+        async with self._lock:
+            # Another request may have refreshed the snapshot while we waited for the lock
+            if self._is_fresh():
+                self._metrics.hits += 1
+                return self._snapshot
+
+            if self._shared is None or self._options.schema_cache_ttl_seconds <= 0:
+                await self._refresh()
+                return self._snapshot
+
+            async with self._shared.lock(SHARED_PROBE_KEY):
+                # Another worker may have refreshed the schema while we waited for the lock
+                await self._adopt_shared_state()
+                if self._is_fresh():
+                    self._metrics.hits += 1
+                else:
+                    full_load = await self._refresh()
+                    self._publish_shared_state(full_load)
+            return self._snapshot
+
+    async def _refresh(self) -> bool:
+        """Reloads or probes the schema; returns True when it was fully reloaded."""
+        if self._snapshot is None or time.monotonic() - self._loaded_at >= self._options.schema_cache_ttl_seconds:
+            await self._full_load()
+            self._metrics.misses += 1
+            return True
+        await self._probe_and_refresh()
+        self._metrics.hits += 1
+        return False
+
+    async def get_table(self, name: str) -> Optional[TableSchema]:
+        """Returns the schema of one table, or None when it does not exist."""
+        if self._is_fresh() and name in self._tables:
+            self._metrics.table_hits += 1
+            return self._tables[name]
+
+        key = await self._table_key(name)
+        entry = self._table_entries.get(key)
+        if entry is not None and self._is_table_fresh(entry, probed=True):
+            self._metrics.table_hits += 1
+            return entry.table
+
+        # Concurrent requests for the same table share one load
+        load = self._table_loads.get(key)
+        if load is None:
+            load = self._table_loads[key] = asyncio.ensure_future(self._load_table(key, name))
+            load.add_done_callback(lambda _: self._table_loads.pop(key, None))
+        return await asyncio.shield(load)
+
+    async def _table_key(self, name: str) -> str:
+        """Table entries are keyed by the exact name, or case-folded when the server compares names case-insensitively."""
+        if self._case_insensitive_names is None:
+            self._case_insensitive_names = await self._db_service.get_lower_case_table_names() != 0
+        return name.lower() if self._case_insensitive_names else name
+
+    async def _load_table(self, key: str, name: str) -> Optional[TableSchema]:
+        entry = self._table_entries.get(key)
+        lookup_name = entry.table.name if entry is not None else name
+        fingerprints = await self._db_service.get_table_fingerprints(table_names=[lookup_name])
+        if not fingerprints:
+            self._table_entries.pop(key, None)
+            return None
+        table_name, fingerprint = next(iter(fingerprints.items()))
+        if entry is not None and entry.fingerprint == fingerprint and self._is_table_fresh(entry, probed=False):
+            entry.probed_at = time.monotonic()
+            self._metrics.table_hits += 1
+            return entry.table
+
+        tables = await self._db_service.get_database_schema([table_name])
+        if not tables:
+            self._table_entries.pop(key, None)
+            return None
+        self._metrics.table_loads += 1
+        if self._options.schema_cache_ttl_seconds > 0:
+            self._table_entries[key] = _TableEntry(tables[0], fingerprint, time.monotonic())
+        return tables[0]
+
+    def _is_table_fresh(self, entry: _TableEntry, probed: bool) -> bool:
+        now = time.monotonic()
+        if now - entry.loaded_at >= self._options.schema_cache_ttl_seconds:
+            return False
+        return not probed or now - entry.probed_at < self._options.schema_probe_interval_seconds
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+        self._table_entries.clear()
+
+    def metrics(self) -> SchemaCacheMetrics:
+        self._metrics.cached_tables = len(self._tables)
+        return self._metrics.model_copy()
+
+    def _is_fresh(self) -> bool:
+        if self._snapshot is None or self._options.schema_cache_ttl_seconds <= 0:
+            return False
+        now = time.monotonic()
+        return (now - self._loaded_at < self._options.schema_cache_ttl_seconds
+                and now - self._probed_at < self._options.schema_probe_interval_seconds)
+
+    async def _full_load(self) -> None:
+        started = time.perf_counter()
+        # Fingerprints are taken first so that changes made during the load are picked up by the next probe
+        fingerprints = await self._db_service.get_table_fingerprints()
+        tables = await self._db_service.get_database_schema()
+        self._fingerprints = fingerprints
+        self._tables = {table.name: table for table in tables}
+        await self._publish()
+        self._loaded_at = self._probed_at = time.monotonic()
+        self._metrics.last_full_load_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Schema cache loaded {len(self._tables)} tables in {self._metrics.last_full_load_ms:.1f} ms")
+
+    async def _probe_and_refresh(self) -> None:
+        started = time.perf_counter()
+        fingerprints = await self._db_service.get_table_fingerprints()
+        self._probed_at = time.monotonic()
+        self._metrics.probes += 1
+        self._metrics.last_probe_ms = (time.perf_counter() - started) * 1000
+
+        changed = [name for name, fingerprint in fingerprints.items() if self._fingerprints.get(name) != fingerprint]
+        dropped = [name for name in self._fingerprints if name not in fingerprints]
+        if not changed and not dropped:
+            return
+
+        started = time.perf_counter()
+        for name in dropped:
+            self._tables.pop(name, None)
+        for name in changed:
+            self._tables.pop(name, None)
+        for table in await self._db_service.get_database_schema(changed):
+            self._tables[table.name] = table
+        self._fingerprints = fingerprints
+        await self._publish()
+
+        self._metrics.incremental_refreshes += 1
+        self._metrics.tables_refreshed += len(changed)
+        self._metrics.last_refresh_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Schema cache refreshed {len(changed)} changed and {len(dropped)} dropped tables "
+            f"in {self._metrics.last_refresh_ms:.1f} ms"
+        )
+
+    async def _publish(self) -> None:
+        # Serializing and indexing thousands of tables takes long enough to stall the event loop
+        tables = [self._tables[name] for name in sorted(self._tables)]
+        self._snapshot = await asyncio.to_thread(SchemaSnapshot, tables)
+
+    async def _adopt_shared_state(self) -> None:
+        probe = self._shared.get(SHARED_PROBE_KEY)
+        if probe is None or probe["probed_at"] <= self._shared_probed_at:
+            return
+        if self._snapshot is None or probe["etag"] != self._snapshot.etag:
+            tables = self._shared.get(SHARED_TABLES_KEY)
+            if tables is None or tables["etag"] != probe["etag"]:
+                return
+            self._tables = {table.name: table for table in tables["tables"]}
+            await self._publish()
+            self._metrics.shared_loads += 1
+        self._fingerprints = probe["fingerprints"]
+        # Shared timestamps are wall-clock; local ones are monotonic
+        offset = time.monotonic() - time.time()
+        self._loaded_at = probe["loaded_at"] + offset
+        self._probed_at = probe["probed_at"] + offset
+        self._shared_probed_at = probe["probed_at"]
+
+    def _publish_shared_state(self, full_load: bool) -> None:
+        offset = time.time() - time.monotonic()
+        ttl = self._options.schema_cache_ttl_seconds
+        previous = self._shared.get(SHARED_PROBE_KEY)
+        if full_load or previous is None or previous["etag"] != self._snapshot.etag:
+            # Rewritten at least once per full load, so it outlives every probe state referring to it
+            self._shared.put(SHARED_TABLES_KEY, {"etag": self._snapshot.etag, "tables": self._snapshot.tables}, 2 * ttl)
+        self._shared_probed_at = self._probed_at + offset
+        self._shared.put(SHARED_PROBE_KEY, {
+            "etag": self._snapshot.etag,
+            "fingerprints": self._fingerprints,
+            "loaded_at": self._loaded_at + offset,
+            "probed_at": self._shared_probed_at
+        }, ttl)
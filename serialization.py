@@ -0,0 +1,94 @@
+import base64
+import datetime
+import decimal
+import json
+from typing import Any, Optional, Sequence
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError: # orjson is optional; the json module is used without it
+    orjson = None
+
+# MySQL column type code of JSON columns (pymysql.constants.FIELD_TYPE.JSON)
+FIELD_TYPE_JSON = 245
+
+def json_default(value: Any) -> Any:
+    """Encodes values returned by MySQL that the json module does not handle natively."""
+    if isinstance(value, BaseModel):
+        # The fields as stored, without model_dump() copying every nested row first
+        return value.__dict__
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _orjson_default(value: Any) -> Any:
+    # orjson handles datetime, date, time and enums natively
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    """Serializes a value (including pydantic models) as compact JSON."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=_orjson_default)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the json module still encodes
+            pass
+    return json.dumps(value, default=json_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def dumps_line(value: Any) -> bytes:
+    """Serializes a value as a single NDJSON line."""
+    return dumps(value) + b"\n"
+
+def loads(data: Any) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def json_column_indexes(description: Optional[Sequence[Sequence[Any]]]) -> Sequence[int]:
+    """Positions of JSON columns in a cursor description; the driver returns their values as text."""
+    return [index for index, column in enumerate(description or ()) if column[1] == FIELD_TYPE_JSON]
+
+def decode_json_columns(rows: Sequence[Any], indexes: Sequence[Any]) -> Sequence[Any]:
+    """
+    Parses JSON column values into objects so they are embedded in responses instead of
+    being sent as escaped strings. indexes are positions for tuple rows, or names for dict rows.
+    """
+    if not indexes:
+        return rows
+    decoded = []
+    for row in rows:
+        row = list(row) if isinstance(row, tuple) else dict(row)
+        for index in indexes:
+            if row[index] is not None:
+                row[index] = loads(row[index])
+        decoded.append(tuple(row) if isinstance(row, list) else row)
+    return decoded
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with dumps(). Endpoints return it directly so FastAPI skips
+    response_model validation and jsonable_encoder, which would walk every row again.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
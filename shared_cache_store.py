@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import itertools
+import logging
+import mmap
+import os
+import pickle
+import stat
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError: # Not available on Windows; locks then only exclude callers within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Polling interval of lock() while another worker holds the file lock, doubling up to the maximum
+LOCK_RETRY_MIN_SECONDS = 0.001
+LOCK_RETRY_MAX_SECONDS = 0.05
+
+class SharedCacheStore:
+    """
+    Cache shared by the worker processes of one server, kept as one file per entry in a
+    directory that is ideally on a memory-backed filesystem such as /dev/shm.
+
+    Entries are written to a temporary file and renamed into place, so readers never see a
+    partial entry, and are read through mmap. Each entry carries an expiry time and the
+    versions of its tags (e.g. table names) at the time it was computed; bump_tags() makes
+    every entry tagged with one of the tags stale for all workers at once.
+    lock() is an advisory file lock, used so that only one worker at a time refreshes an
+    entry (e.g. probes INFORMATION_SCHEMA) while the others wait and then read its result.
+    When the entries exceed max_bytes the oldest written ones are removed.
+
+    Entries are unpickled, so anyone who can write to the directory can run code in the
+    workers. It is created with mode 0700, and an existing directory is refused unless it
+    is owned by the current user and not writable by group or others.
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._check_directory()
+        self._temp_names = itertools.count()
+        self._written_since_sweep = 0
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the value stored under key, or None when it is missing, expired or its tags were bumped."""
+        record = self._read(self._path("entry", key))
+        if record is None:
+            return None
+        expires_at, tag_versions, value = record
+        if expires_at <= time.time():
+            return None
+        if tag_versions and self.tag_versions(tag_versions) != tag_versions:
+            return None
+        return value
+
+    def put(self, key: str, value: Any, ttl_seconds: float, tag_versions: Optional[Dict[str, str]] = None) -> None:
+        """
+        Stores value under key for ttl_seconds. tag_versions must be read with tag_versions()
+        before the value was computed, so a concurrent bump_tags() makes it stale.
+        """
+        data = pickle.dumps((time.time() + ttl_seconds, tag_versions or {}, value), protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        self._write(self._path("entry", key), data)
+        self._written_since_sweep += len(data)
+        if self._written_since_sweep > self.max_bytes // 8:
+            self._written_since_sweep = 0
+            self._sweep()
+
+    def tag_versions(self, tags: Sequence[str]) -> Dict[str, str]:
+        versions = {}
+        for tag in tags:
+            try:
+                with open(self._path("tag", tag), "rb") as tag_file:
+                    versions[tag] = tag_file.read().decode("ascii")
+            except FileNotFoundError:
+                versions[tag] = ""
+        return versions
+
+    def bump_tags(self, tags: Sequence[str]) -> None:
+        version = f"{os.getpid()}-{time.time_ns()}".encode("ascii")
+        for tag in tags:
+            self._write(self._path("tag", tag), version)
+
+    @asynccontextmanager
+    async def lock(self, name: str) -> AsyncIterator[None]:
+        """
+        Holds an exclusive lock across all workers. Callers of one process queue on an
+        asyncio.Lock, and only the one holding it polls the file lock, without blocking.
+        """
+        local = self._locks.get(name)
+        if local is None:
+            local = self._locks[name] = asyncio.Lock()
+        self._lock_users[name] = self._lock_users.get(name, 0) + 1
+        try:
+            async with local:
+                if fcntl is None:
+                    yield
+                    return
+                lock_file = open(self._path("lock", name), "ab")
+                try:
+                    delay = LOCK_RETRY_MIN_SECONDS
+                    while True:
+                        try:
+                            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                            break
+                        except BlockingIOError:
+                            await asyncio.sleep(delay)
+                            delay = min(delay * 2, LOCK_RETRY_MAX_SECONDS)
+                    yield
+                finally:
+                    # Closing the file releases the lock
+                    lock_file.close()
+        finally:
+            users = self._lock_users[name] - 1
+            if users:
+                self._lock_users[name] = users
+            else:
+                del self._lock_users[name]
+                del self._locks[name]
+
+    async def get_or_refresh(self, key: str, max_age_seconds: float, refresh: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the value stored under key if it is at most max_age_seconds old. Otherwise one
+        worker runs refresh() and stores its result while the others wait for it.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        async with self.lock(key):
+            # Another worker may have refreshed the value while we waited for the lock
+            value = self.get(key)
+            if value is None:
+                value = await refresh()
+                self.put(key, value, max_age_seconds)
+            return value
+
+    def _check_directory(self) -> None:
+        if not hasattr(os, "getuid"):
+            return
+        info = os.lstat(self.directory)
+        if not stat.S_ISDIR(info.st_mode):
+            raise PermissionError(f"Shared cache directory {self.directory} is not a directory")
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"Shared cache directory {self.directory} is not owned by the current user")
+        if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError(f"Shared cache directory {self.directory} is writable by group or others; use mode 0700")
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.directory, f"{kind}-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:40]}")
+
+    def _read(self, path: str) -> Optional[Any]:
+        try:
+            with open(path, "rb") as entry_file, mmap.mmap(entry_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return pickle.loads(data)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            # Missing, empty or removed while being read
+            return None
+
+    def _write(self, path: str, data: bytes) -> None:
+        temp_path = os.path.join(self.directory, f"tmp-{os.getpid()}-{next(self._temp_names)}")
+        try:
+            with open(temp_path, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write shared cache entry {path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _sweep(self) -> None:
+        """Removes entries beyond max_bytes, oldest written first."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.name.startswith("entry-"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        logger.debug(f"Shared cache removed {removed} entries to stay within {self.max_bytes} bytes")
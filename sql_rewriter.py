@@ -0,0 +1,406 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from config import DatabaseOptions
+from models.sql_rewrite_metrics import SqlRewriteMetrics
+
+class QueryRejectedError(ValueError):
+    """Raised when a query is not allowed by the configured DatabaseOptions."""
+    pass
+
+# Positional values for %s / ? placeholders, or named values for %(name)s placeholders
+QueryParameters = Union[Sequence[Any], Mapping[str, Any]]
+
+class RewrittenQuery(NamedTuple):
+    sql: str
+    statement_type: str
+    read_only: bool
+    limit: Optional[int]
+    tables: Tuple[str, ...]
+    deterministic: bool
+    # One entry per placeholder: the name of %(name)s placeholders, None for positional ones
+    parameters: Tuple[Optional[str], ...]
+    # The statement with literals replaced by ?, shared by queries differing only in values
+    shape: str = ""
+    # Index into parameters of a placeholder LIMIT count, whose value clamp_limit_parameter() caps to limit
+    limit_parameter: Optional[int] = None
+
+class _Token(NamedTuple):
+    kind: str
+    text: str
+    upper: str
+    depth: int
+    piece: int
+
+# Strings and quoted identifiers match their body inside a lookahead and then the captured
+# text: an atomic group that never backtracks into a run of '' pairs (possessive quantifiers
+# would need Python 3.11)
+_TOKEN_PATTERN = re.compile(r"""
+      (?P<ws>\s+)
+    | (?P<comment>--(?=\s|$)[^\n]*|\#[^\n]*|/\*(?![!+]).*?\*/)
+    | (?P<hint>/\*\+.*?\*/)
+    | (?P<executable>/\*!.*?\*/)
+    | (?P<string>'(?=(?P<single>[^'\\]*(?:(?:\\.|'')[^'\\]*)*))(?P=single)'
+                |"(?=(?P<double>[^"\\]*(?:(?:\\.|"")[^"\\]*)*))(?P=double)")
+    | (?P<quoted>`(?=(?P<backtick>[^`]*(?:``[^`]*)*))(?P=backtick)`)
+    | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\w$]))
+    | (?P<variable>@@?(?:[\w$.]+|'(?:[^'\\]|\\.)*'|`[^`]*`))
+    | (?P<word>[^\W\d][\w$]*|\d+[^\W\d][\w$]*)
+    | (?P<param>%\([^)]*\)s|%s|\?)
+    | (?P<unterminated>['"`]|/\*)
+    | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+READ_ONLY_STATEMENTS = {"SELECT", "TABLE", "VALUES", "SHOW", "DESCRIBE", "DESC", "EXPLAIN"}
+LIMITABLE_STATEMENTS = {"SELECT", "TABLE"}
+EXPLAIN_STATEMENTS = {"EXPLAIN", "DESCRIBE", "DESC"}
+MAIN_STATEMENTS = {"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "TABLE", "VALUES"}
+FROM_CLAUSE_END = {
+    "WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "UNION", "EXCEPT", "INTERSECT", "WINDOW",
+    "ON", "USING", "FOR", "LOCK", "INTO", "SET", "VALUES", "SELECT", "RETURNING"
+}
+TABLE_REFERENCE_KEYWORDS = {"FROM", "JOIN", "STRAIGHT_JOIN", "UPDATE", "INTO", "TABLE"}
+# Functions whose result can differ between two executions over unchanged tables
+NONDETERMINISTIC_FUNCTIONS = {
+    "NOW", "SYSDATE", "CURDATE", "CURTIME", "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP",
+    "LOCALTIME", "LOCALTIMESTAMP", "UTC_DATE", "UTC_TIME", "UTC_TIMESTAMP", "UNIX_TIMESTAMP",
+    "RAND", "UUID", "UUID_SHORT", "RANDOM_BYTES", "CONNECTION_ID", "CURRENT_USER", "USER",
+    "SESSION_USER", "SYSTEM_USER", "DATABASE", "SCHEMA", "LAST_INSERT_ID", "FOUND_ROWS", "ROW_COUNT",
+    "SLEEP", "GET_LOCK", "IS_FREE_LOCK", "IS_USED_LOCK", "RELEASE_LOCK", "BENCHMARK"
+}
+
+class SqlRewriter:
+    """
+    Classifies queries and rewrites them according to DatabaseOptions:
+    rejects multiple statements, rejects anything but read-only statements when
+    enforce_read_only is set, and appends or clamps LIMIT to max_rows when
+    require_limit is set. Results are kept in an LRU cache keyed by the query text,
+    so repeated queries skip tokenizing and analysis; a query spelled differently (other
+    whitespace or comments) is tokenized, then found under its normalized text. For parameterized queries the
+    key is the template, so the analysis is shared by every set of parameter values.
+    """
+    def __init__(self, options: DatabaseOptions):
+        self.options = options
+        self._cache: "OrderedDict[Tuple[str, bool, bool, Optional[int]], RewrittenQuery]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def rewrite(self, query: str, apply_limit: bool = True, parameterized: bool = False, max_rows: Optional[int] = None) -> RewrittenQuery:
+        """
+        With parameterized set, the returned SQL is a template for the driver: ? placeholders
+        become %s and literal % characters are doubled so they survive parameter binding.
+        max_rows overrides options.max_rows and applies a LIMIT even without require_limit.
+        """
+        key = (query.strip(), apply_limit, parameterized, max_rows)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+
+        pieces, tokens = self._tokenize(key[0])
+        normalized_key = ("".join(pieces).strip(), apply_limit, parameterized, max_rows)
+        with self._lock:
+            cached = self._lookup(normalized_key) if normalized_key != key else None
+            if cached is not None:
+                self._store(key, cached)
+                return cached
+            self.misses += 1
+
+        # Rejections are not cached; they are rare and usually not retried verbatim
+        rewritten = self._analyze(pieces, tokens, apply_limit, parameterized, max_rows)
+
+        with self._lock:
+            self._store(normalized_key, rewritten)
+            self._store(key, rewritten)
+        return rewritten
+
+    def _lookup(self, key: Tuple[str, bool, bool, Optional[int]]) -> Optional[RewrittenQuery]:
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+        return cached
+
+    def _store(self, key: Tuple[str, bool, bool, Optional[int]], rewritten: RewrittenQuery) -> None:
+        self._cache[key] = rewritten
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.options.sql_cache_size:
+            self._cache.popitem(last=False)
+
+    def metrics(self) -> SqlRewriteMetrics:
+        return SqlRewriteMetrics(hits=self.hits, misses=self.misses, size=len(self._cache))
+
+    @staticmethod
+    def check_parameters(rewritten: RewrittenQuery, params: Optional[QueryParameters]) -> None:
+        """Raises QueryRejectedError when params do not match the placeholders of the query."""
+        names = rewritten.parameters
+        if params is None:
+            if names:
+                raise QueryRejectedError(f"Query has {len(names)} placeholder(s) but no params were given")
+            return
+
+        if isinstance(params, Mapping):
+            if any(name is None for name in names):
+                raise QueryRejectedError("Positional placeholders (%s or ?) require params to be a list")
+            missing = [name for name in dict.fromkeys(names) if name not in params]
+            if missing:
+                raise QueryRejectedError(f"Missing params: {', '.join(missing)}")
+            values = params.values()
+        else:
+            if any(name is not None for name in names):
+                raise QueryRejectedError("Named placeholders (%(name)s) require params to be an object")
+            if len(params) != len(names):
+                raise QueryRejectedError(f"Query has {len(names)} placeholder(s) but {len(params)} params were given")
+            values = params
+
+        for value in values:
+            # A list expands to a parenthesized value list, e.g. for IN %s
+            items = value if isinstance(value, (list, tuple)) else (value,)
+            if any(isinstance(item, (Mapping, list, tuple, set)) for item in items):
+                raise QueryRejectedError("Param values must be scalars or lists of scalars")
+
+    @staticmethod
+    def clamp_limit_parameter(rewritten: RewrittenQuery, params: Optional[QueryParameters]) -> Optional[QueryParameters]:
+        """
+        Returns params with the value of a placeholder LIMIT count capped to rewritten.limit.
+        Call after check_parameters(). Raises QueryRejectedError when the value is not a
+        row count, or exceeds the limit through a named placeholder that is also used elsewhere.
+        """
+        index = rewritten.limit_parameter
+        if index is None or params is None:
+            return params
+        name = rewritten.parameters[index]
+        value = params[name] if isinstance(params, Mapping) else params[index]
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise QueryRejectedError("The LIMIT param must be a non-negative integer")
+        if value <= rewritten.limit:
+            return params
+        if name is None:
+            clamped = list(params)
+            clamped[index] = rewritten.limit
+            return clamped
+        if rewritten.parameters.count(name) > 1:
+            raise QueryRejectedError(
+                f"LIMIT %({name})s exceeds the maximum of {rewritten.limit} rows; use a placeholder of its own for the LIMIT"
+            )
+        return {**params, name: rewritten.limit}
+
+    def _analyze(
+        self,
+        pieces: List[str],
+        tokens: List[_Token],
+        apply_limit: bool,
+        parameterized: bool,
+        max_rows: Optional[int] = None
+    ) -> RewrittenQuery:
+        tokens = self._single_statement(tokens, pieces)
+        if not tokens:
+            raise QueryRejectedError("Query is empty")
+        if parameterized:
+            self._prepare_template(tokens, pieces)
+
+        statement_type = self._statement_type(tokens)
+        read_only = statement_type in READ_ONLY_STATEMENTS
+        if self.options.enforce_read_only:
+            if not read_only:
+                raise QueryRejectedError(f"Only read-only statements are allowed, got {statement_type}")
+            self._reject_side_effects(tokens)
+
+        shape = " ".join("?" if token.kind in ("string", "number") else token.upper for token in tokens)
+        limit = limit_parameter = None
+        if apply_limit and (self.options.require_limit or max_rows is not None) and statement_type in LIMITABLE_STATEMENTS:
+            limit, limit_parameter = self._apply_limit(tokens, pieces, self.options.max_rows if max_rows is None else max_rows)
+
+        sql = "".join(pieces).strip()
+        parameters = tuple(token.text[2:-2] if token.text.startswith("%(") else None for token in tokens if token.kind == "param")
+        return RewrittenQuery(
+            sql, statement_type, read_only, limit, tuple(self._referenced_tables(tokens)), self._is_deterministic(tokens),
+            parameters, shape, limit_parameter
+        )
+
+    @staticmethod
+    def _tokenize(query: str) -> Tuple[List[str], List[_Token]]:
+        """
+        Splits the query into output pieces and significant tokens. Whitespace and
+        comments collapse into a single space; everything else is kept verbatim.
+        """
+        pieces: List[str] = []
+        tokens: List[_Token] = []
+        depth = 0
+        for match in _TOKEN_PATTERN.finditer(query):
+            kind = match.lastgroup
+            text = match.group()
+            if kind == "ws" or kind == "comment":
+                if pieces and pieces[-1] != " ":
+                    pieces.append(" ")
+                continue
+            if kind == "unterminated":
+                raise QueryRejectedError("Query contains an unterminated string, identifier or comment")
+            if text == ")":
+                depth = max(0, depth - 1)
+            tokens.append(_Token(kind, text, text.upper() if kind == "word" else text, depth, len(pieces)))
+            pieces.append(text)
+            if text == "(":
+                depth += 1
+        return pieces, tokens
+
+    @staticmethod
+    def _single_statement(tokens: List[_Token], pieces: List[str]) -> List[_Token]:
+        separators = [i for i, token in enumerate(tokens) if token.text == ";" and token.depth == 0]
+        if not separators:
+            return tokens
+        # Trailing semicolons are dropped; anything after a separator is another statement
+        first = separators[0]
+        if any(token.text != ";" for token in tokens[first:]):
+            raise QueryRejectedError("Multiple statements are not allowed")
+        for token in tokens[first:]:
+            pieces[token.piece] = ""
+        return tokens[:first]
+
+    @staticmethod
+    def _prepare_template(tokens: List[_Token], pieces: List[str]) -> None:
+        for token in tokens:
+            if token.kind == "param":
+                if token.text == "?":
+                    pieces[token.piece] = "%s"
+            elif "%" in token.text:
+                pieces[token.piece] = token.text.replace("%", "%%")
+
+    @staticmethod
+    def _statement_type(tokens: List[_Token]) -> str:
+        words = [token for token in tokens if token.kind == "word"]
+        if not words:
+            return "UNKNOWN"
+        first = words[0].upper
+        if first in EXPLAIN_STATEMENTS and len(words) > 1 and words[1].upper == "ANALYZE":
+            # Runs the explained statement, so it is only as read-only as that statement
+            return "EXPLAIN ANALYZE"
+        if first != "WITH":
+            return first
+        # The CTE bodies are parenthesized, so the main statement is the first keyword back at the WITH depth
+        base_depth = words[0].depth
+        for token in words[1:]:
+            if token.depth == base_depth and token.upper in MAIN_STATEMENTS:
+                return token.upper
+        return "WITH"
+
+    @staticmethod
+    def _reject_side_effects(tokens: List[_Token]) -> None:
+        for i, token in enumerate(tokens):
+            if token.kind == "executable":
+                raise QueryRejectedError("Executable comments (/*! ... */) are not allowed in read-only mode")
+            if token.kind != "word":
+                continue
+            following = tokens[i + 1].upper if i + 1 < len(tokens) else ""
+            if token.upper == "INTO":
+                raise QueryRejectedError("SELECT ... INTO is not allowed in read-only mode")
+            if (token.upper == "FOR" and following in ("UPDATE", "SHARE")) or (token.upper == "LOCK" and following == "IN"):
+                raise QueryRejectedError("Locking reads are not allowed in read-only mode")
+
+    def _apply_limit(self, tokens: List[_Token], pieces: List[str], max_rows: int) -> Tuple[int, Optional[int]]:
+        """Returns the effective limit, and the index of the placeholder holding it when it is bound later."""
+        base_depth = tokens[0].depth
+        limit_index = None
+        insert_before = None
+        for i, token in enumerate(tokens):
+            if token.depth != base_depth or token.kind != "word":
+                continue
+            following = tokens[i + 1].upper if i + 1 < len(tokens) else ""
+            if token.upper == "LIMIT":
+                limit_index = i
+            elif insert_before is None and (
+                (token.upper == "FOR" and following in ("UPDATE", "SHARE"))
+                or (token.upper == "LOCK" and following == "IN")
+                or (token.upper == "INTO" and limit_index is None and self._after_from(tokens, i))
+            ):
+                insert_before = i
+
+        if limit_index is None:
+            if insert_before is None:
+                pieces.append(f" LIMIT {max_rows}")
+            else:
+                pieces[tokens[insert_before].piece] = f"LIMIT {max_rows} {pieces[tokens[insert_before].piece]}"
+            return max_rows, None
+
+        # LIMIT count | LIMIT offset, count | LIMIT count OFFSET offset
+        arguments = tokens[limit_index + 1:limit_index + 4]
+        count_index = limit_index + 3 if len(arguments) == 3 and arguments[1].text == "," else limit_index + 1
+        count = tokens[count_index] if count_index < len(tokens) else None
+        if count is not None and count.kind == "number" and count.text.isdigit():
+            if int(count.text) > max_rows:
+                pieces[count.piece] = str(max_rows)
+                return max_rows, None
+            return int(count.text), None
+        if count is not None and count.kind == "param":
+            # The value is only known when params are bound; clamp_limit_parameter() caps it then
+            return max_rows, sum(1 for token in tokens[:count_index] if token.kind == "param")
+        raise QueryRejectedError("The LIMIT row count must be a number or a placeholder")
+
+    @staticmethod
+    def _after_from(tokens: List[_Token], index: int) -> bool:
+        base_depth = tokens[index].depth
+        return any(t.upper == "FROM" and t.depth == base_depth for t in tokens[:index])
+
+    @staticmethod
+    def _is_deterministic(tokens: List[_Token]) -> bool:
+        for token in tokens:
+            if token.kind == "variable" or (token.kind == "word" and token.upper in NONDETERMINISTIC_FUNCTIONS):
+                return False
+        return True
+
+    @staticmethod
+    def _referenced_tables(tokens: List[_Token]) -> List[str]:
+        """Collects the table names referenced by FROM/JOIN/UPDATE/INTO/TABLE clauses, excluding CTEs."""
+        cte_names: Set[str] = set()
+        if tokens and tokens[0].upper == "WITH":
+            base_depth = tokens[0].depth
+            for i, token in enumerate(tokens[1:-1], start=1):
+                if token.depth == base_depth and tokens[i + 1].upper == "AS" and token.kind in ("word", "quoted"):
+                    cte_names.add(_unquote(token.text))
+                elif token.depth == base_depth and tokens[i + 1].text == "(" and token.kind in ("word", "quoted") \
+                        and token.upper not in ("AS", "RECURSIVE"):
+                    cte_names.add(_unquote(token.text))
+
+        tables: List[str] = []
+        # Depths of the FROM clauses currently open, so comma-separated table lists are followed
+        from_depths: List[int] = []
+        expect_table = False
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            while from_depths and token.depth < from_depths[-1]:
+                from_depths.pop()
+            previous = tokens[i - 1].upper if i > 0 else ""
+            if token.kind == "word" and token.upper in TABLE_REFERENCE_KEYWORDS \
+                    and not (token.upper == "UPDATE" and previous in ("FOR", "KEY")):
+                expect_table = True
+                if token.upper in ("FROM", "JOIN", "STRAIGHT_JOIN"):
+                    from_depths.append(token.depth)
+                i += 1
+                continue
+            if from_depths and token.depth == from_depths[-1]:
+                if token.kind == "word" and token.upper in FROM_CLAUSE_END:
+                    from_depths.pop()
+                elif token.text == ",":
+                    expect_table = True
+                    i += 1
+                    continue
+            if expect_table:
+                expect_table = False
+                if token.kind in ("word", "quoted") and token.upper not in ("OUTFILE", "DUMPFILE"):
+                    name = _unquote(token.text)
+                    if i + 2 < len(tokens) and tokens[i + 1].text == "." and tokens[i + 2].kind in ("word", "quoted"):
+                        name = f"{name}.{_unquote(tokens[i + 2].text)}"
+                        i += 2
+                    if name not in cte_names and name.upper() != "DUAL" and name not in tables:
+                        tables.append(name)
+            i += 1
+        return tables
+
+def _unquote(identifier: str) -> str:
+    if identifier.startswith("`") and identifier.endswith("`"):
+        return identifier[1:-1].replace("``", "`")
+    return identifier
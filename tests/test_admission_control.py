@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from admission_control import AdmissionController, AdmissionRejectedError, current_client
+
+def test_cancelled_waiter_does_not_leak_slot_when_holder_releases():
+    async def scenario():
+        controller = AdmissionController("query", max_concurrency=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit():
+                await release.wait()
+
+        async def wait():
+            async with controller.admit():
+                pass
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(wait())
+        await asyncio.sleep(0)
+        assert controller.metrics().queued == 1
+
+        # The waiter's cancellation cancels its future and yields while it is still queued;
+        # the holder releases in that window
+        waiter.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await holder
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        metrics = controller.metrics()
+        assert (metrics.running, metrics.queued) == (0, 0)
+        async with controller.admit():
+            assert controller.metrics().running == 1
+
+    asyncio.run(scenario())
+
+def test_timed_out_waiter_is_rejected_and_removed():
+    async def scenario():
+        controller = AdmissionController("query", max_concurrency=1, queue_timeout_seconds=0.05)
+        async with controller.admit():
+            with pytest.raises(AdmissionRejectedError):
+                async with controller.admit():
+                    pass
+        metrics = controller.metrics()
+        assert (metrics.running, metrics.queued, metrics.timed_out) == (0, 0, 1)
+
+    asyncio.run(scenario())
+
+def test_per_client_limit_lets_other_clients_through():
+    async def scenario():
+        controller = AdmissionController("query", max_concurrency=2, max_per_client=1)
+        order = []
+
+        async def run(client: str) -> None:
+            current_client.set(client)
+            async with controller.admit():
+                order.append(client)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(run("a"), run("a"), run("b"))
+        assert order == ["a", "b", "a"]
+
+    asyncio.run(scenario())
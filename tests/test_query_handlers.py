@@ -0,0 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pymysql
+
+from benchmarks.fake_mysql import FakePool
+from config import DatabaseOptions
+from database_service import DatabaseService
+from rpc.handlers.query_execute_handler import QueryExecuteHandler
+from rpc.handlers.query_stream_handler import QueryStreamHandler
+from rpc.json_rpc_interfaces import JsonRpcRequest
+from rpc.json_rpc_router import JsonRpcRouter
+
+def _failing_responder(sql, args):
+    raise pymysql.err.ProgrammingError(1064, "You have an error in your SQL syntax")
+
+def _service(responder) -> DatabaseService:
+    return DatabaseService(DatabaseOptions(connection_string="server=x"), FakePool(responder))
+
+def _request(method, query):
+    return JsonRpcRequest(id=1, method=method, params={"query": query})
+
+def test_execute_reports_mysql_errors_as_query_failed():
+    handler = QueryExecuteHandler(_service(_failing_responder))
+    response = asyncio.run(handler.handle(_request("query/execute", "SELECT missing FROM t")))
+    assert response.result is None
+    assert response.error.code == -32602
+    assert response.error.message.startswith("Query failed: (1064")
+
+def test_stream_reports_mysql_errors_and_releases_the_connection():
+    service = _service(_failing_responder)
+    acquire = service.pool.acquire
+    held = []
+
+    @asynccontextmanager
+    async def tracked_acquire():
+        async with acquire() as connection:
+            held.append(connection)
+            try:
+                yield connection
+            finally:
+                held.remove(connection)
+
+    service.pool.acquire = tracked_acquire
+    handler = QueryStreamHandler(service)
+    response = asyncio.run(handler.handle(_request("query/stream", "SELECT missing FROM t")))
+    assert response.error.code == -32602
+    assert response.error.message.startswith("Query failed: (1064")
+    assert held == []
+    assert service.query_admission.metrics().running == 0
+
+def test_stream_in_batch_is_refused_before_the_query_runs():
+    executed = []
+
+    def responder(sql, args):
+        executed.append(sql)
+        return ["a"], [(1,)]
+
+    router = JsonRpcRouter([QueryStreamHandler(_service(responder))], [])
+    entry = {"jsonrpc": "2.0", "id": 1, "method": "query/stream", "params": {"query": "SELECT a FROM t"}}
+    responses = asyncio.run(router.handle_batch_async([entry, dict(entry, id=2)]))
+    assert [response.error.code for response in responses] == [-32600, -32600]
+    assert executed == []
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from config import DatabaseOptions
+from query_result_cache import CachedResult, QueryResultCache
+from sql_rewriter import SqlRewriter
+
+def make_cache():
+    options = DatabaseOptions(connection_string="server=localhost", query_cache_ttl_seconds=60)
+
+    async def probe():
+        return {"orders": "fingerprint"}
+
+    return QueryResultCache(options, probe), SqlRewriter(options)
+
+def run_twice(query):
+    cache, rewriter = make_cache()
+    rewritten = rewriter.rewrite(query, apply_limit=False)
+    executions = []
+
+    async def execute():
+        executions.append(query)
+        return CachedResult(["value"], [(len(executions),)], 1)
+
+    async def scenario():
+        await cache.get_or_execute(rewritten, execute)
+        await cache.get_or_execute(rewritten, execute)
+
+    asyncio.run(scenario())
+    return len(executions), cache.metrics()
+
+def test_select_results_are_cached():
+    executions, metrics = run_twice("SELECT * FROM orders")
+    assert executions == 1
+    assert metrics.hits == 1
+
+@pytest.mark.parametrize("query", [
+    "SHOW CREATE TABLE orders",
+    "SHOW COLUMNS FROM orders",
+    "DESCRIBE orders",
+    "EXPLAIN SELECT * FROM orders",
+])
+def test_metadata_statements_are_not_cached(query):
+    executions, metrics = run_twice(query)
+    assert executions == 2
+    assert metrics.uncacheable == 2
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import stat
+
+import pytest
+
+from shared_cache_store import SharedCacheStore
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+
+def test_creates_directory_private_to_the_user(tmp_path):
+    directory = tmp_path / "cache"
+    store = SharedCacheStore(str(directory), 1 << 20)
+    assert stat.S_IMODE(directory.stat().st_mode) & 0o077 == 0
+    store.put("key", {"value": 1}, 60)
+    assert store.get("key") == {"value": 1}
+
+@pytest.mark.parametrize("mode", [0o770, 0o707, 0o777])
+def test_refuses_directory_writable_by_others(tmp_path, mode):
+    directory = tmp_path / "cache"
+    directory.mkdir()
+    directory.chmod(mode)
+    with pytest.raises(PermissionError):
+        SharedCacheStore(str(directory), 1 << 20)
+
+def test_refuses_symlinked_directory(tmp_path):
+    target = tmp_path / "target"
+    target.mkdir(mode=0o700)
+    link = tmp_path / "cache"
+    link.symlink_to(target)
+    with pytest.raises(PermissionError):
+        SharedCacheStore(str(link), 1 << 20)
+
+def test_lock_excludes_holders_and_is_released(tmp_path):
+    store = SharedCacheStore(str(tmp_path / "cache"), 1 << 20)
+    # Two stores over one directory stand in for two worker processes
+    other = SharedCacheStore(str(tmp_path / "cache"), 1 << 20)
+
+    async def scenario():
+        order = []
+
+        async def hold(name, store_, pause):
+            async with store_.lock("probe"):
+                order.append(f"{name} in")
+                await asyncio.sleep(pause)
+                order.append(f"{name} out")
+
+        first = asyncio.create_task(hold("a", store, 0.05))
+        await asyncio.sleep(0)
+        await asyncio.gather(first, hold("b", other, 0), hold("c", store, 0))
+        assert order[:2] == ["a in", "a out"]
+        # Never two holders at once: every "in" is directly followed by its own "out"
+        assert [entry.split()[0] for entry in order[::2]] == [entry.split()[0] for entry in order[1::2]]
+        assert not store._locks and not other._locks
+
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+import pytest
+
+from config import DatabaseOptions
+from sql_rewriter import QueryRejectedError, SqlRewriter
+
+def make_rewriter(**overrides) -> SqlRewriter:
+    return SqlRewriter(DatabaseOptions(connection_string="server=localhost", **overrides))
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM orders",
+    "WITH recent AS (SELECT * FROM orders) SELECT * FROM recent",
+    "TABLE orders",
+    "SHOW TABLES",
+    "DESCRIBE orders",
+    "EXPLAIN SELECT * FROM orders",
+    "EXPLAIN FORMAT=JSON SELECT * FROM orders",
+    "EXPLAIN UPDATE orders SET total = 0",
+])
+def test_read_only_statements_are_accepted(query):
+    assert make_rewriter().rewrite(query).read_only
+
+@pytest.mark.parametrize("query", [
+    "INSERT INTO orders VALUES (1)",
+    "UPDATE orders SET total = 0",
+    "DELETE FROM orders",
+    "WITH old AS (SELECT id FROM orders) DELETE FROM orders WHERE id IN (SELECT id FROM old)",
+    "EXPLAIN ANALYZE SELECT * FROM orders",
+    "explain analyze UPDATE orders o JOIN customers c ON o.customer_id = c.id SET o.total = 0",
+    "DESCRIBE ANALYZE DELETE FROM orders",
+    "ANALYZE TABLE orders",
+    "SELECT * FROM orders INTO OUTFILE '/tmp/orders'",
+    "SELECT * FROM orders FOR UPDATE",
+    "SELECT * FROM orders LOCK IN SHARE MODE",
+    "SELECT /*!50000 SLEEP(1) */ 1",
+    "SELECT 1; DELETE FROM orders",
+])
+def test_statements_with_side_effects_are_rejected(query):
+    with pytest.raises(QueryRejectedError):
+        make_rewriter().rewrite(query)
+
+def test_explain_analyze_is_allowed_without_read_only_enforcement():
+    rewritten = make_rewriter(enforce_read_only=False).rewrite("EXPLAIN ANALYZE SELECT 1")
+    assert rewritten.statement_type == "EXPLAIN ANALYZE"
+    assert not rewritten.read_only
+
+def test_limit_is_appended_and_clamped():
+    rewriter = make_rewriter(max_rows=100)
+    assert rewriter.rewrite("SELECT * FROM orders").sql == "SELECT * FROM orders LIMIT 100"
+    assert rewriter.rewrite("SELECT * FROM orders LIMIT 5000").sql == "SELECT * FROM orders LIMIT 100"
+    assert rewriter.rewrite("SELECT * FROM orders LIMIT 10").limit == 10
+
+def test_placeholder_limit_is_capped_when_params_are_bound():
+    rewriter = make_rewriter(max_rows=100)
+    # Not wrapped in a derived table, which would fail on the duplicate id columns
+    rewritten = rewriter.rewrite("SELECT a.id, b.id FROM a JOIN b ON a.b_id = b.id LIMIT ?, ?", parameterized=True)
+    assert rewritten.sql == "SELECT a.id, b.id FROM a JOIN b ON a.b_id = b.id LIMIT %s, %s"
+    assert rewriter.clamp_limit_parameter(rewritten, [20, 5000]) == [20, 100]
+    assert rewriter.clamp_limit_parameter(rewritten, [20, 50]) == [20, 50]
+
+    named = rewriter.rewrite("SELECT * FROM orders WHERE id > %(id)s LIMIT %(n)s", parameterized=True)
+    assert rewriter.clamp_limit_parameter(named, {"id": 1, "n": 5000}) == {"id": 1, "n": 100}
+
+@pytest.mark.parametrize("query, params", [
+    ("SELECT * FROM orders LIMIT ?", ["10"]),
+    ("SELECT * FROM orders WHERE id > %(n)s LIMIT %(n)s", {"n": 5000}),
+])
+def test_unsafe_placeholder_limits_are_rejected(query, params):
+    rewriter = make_rewriter(max_rows=100)
+    with pytest.raises(QueryRejectedError):
+        rewriter.clamp_limit_parameter(rewriter.rewrite(query, parameterized=True), params)
+
+def test_differently_spelled_queries_share_a_cache_entry():
+    rewriter = make_rewriter()
+    first = rewriter.rewrite("SELECT  *\n FROM orders")
+    second = rewriter.rewrite("SELECT * /* listing */ FROM orders")
+    assert second is first
+    assert rewriter.metrics().misses == 1
+
+def test_whitespace_inside_literals_is_not_normalized():
+    rewriter = make_rewriter()
+    first = rewriter.rewrite("SELECT * FROM orders WHERE note = 'a  b'")
+    second = rewriter.rewrite("SELECT * FROM orders WHERE note = 'a b'")
+    assert first.sql != second.sql